@@ -0,0 +1,34 @@
+"""add notification outbox coalescing
+
+Revision ID: 1f6a8c2e4d90
+Revises: e5b93d07a6f2
+Create Date: 2026-10-19 13:34:27.551046
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f6a8c2e4d90'
+down_revision: Union[str, None] = 'e5b93d07a6f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notification_outbox', sa.Column('event_type', sa.String(), nullable=True))
+    op.add_column('notification_outbox', sa.Column('group_key', sa.String(), nullable=True))
+    op.add_column('notification_outbox', sa.Column('group_label', sa.String(), nullable=True))
+    op.create_index('ix_notification_outbox_pending_user', 'notification_outbox', ['user_id'], unique=False,
+                    postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_outbox_pending_user', table_name='notification_outbox',
+                  postgresql_where=sa.text("status = 'pending'"))
+    op.drop_column('notification_outbox', 'group_label')
+    op.drop_column('notification_outbox', 'group_key')
+    op.drop_column('notification_outbox', 'event_type')
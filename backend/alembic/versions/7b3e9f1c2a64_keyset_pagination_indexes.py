@@ -0,0 +1,46 @@
+"""keyset pagination indexes
+
+Revision ID: 7b3e9f1c2a64
+Revises: 1f6a8c2e4d90
+Create Date: 2026-10-19 14:48:12.730459
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e9f1c2a64'
+down_revision: Union[str, None] = '1f6a8c2e4d90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing shares take the prayer's own creation time, the best estimate there is
+    op.add_column('prayer_wall_prayers', sa.Column('created_at', sa.DateTime(), nullable=True))
+    op.execute("""
+        UPDATE prayer_wall_prayers SET created_at = COALESCE(prayers.created_at, now())
+        FROM prayers WHERE prayers.id = prayer_wall_prayers.prayer_id
+    """)
+    op.execute("UPDATE prayer_wall_prayers SET created_at = now() WHERE created_at IS NULL")
+    op.alter_column('prayer_wall_prayers', 'created_at', nullable=False, server_default=sa.text('now()'))
+
+    # Build the indexes without locking out writes to the tables
+    with op.get_context().autocommit_block():
+        op.create_index('ix_prayers_user_created', 'prayers', ['user_id', 'created_at', 'id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_prayer_wall_prayers_wall_created', 'prayer_wall_prayers',
+                        ['prayer_wall_id', 'created_at', 'prayer_id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_prayer_wall_prayers_wall_created', table_name='prayer_wall_prayers',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_prayers_user_created', table_name='prayers',
+                      postgresql_concurrently=True)
+    op.drop_column('prayer_wall_prayers', 'created_at')
@@ -0,0 +1,27 @@
+"""add prayer_notifications due index
+
+Revision ID: 8d2f4b6a9c13
+Revises: 3a9c1e5d7b21
+Create Date: 2026-10-19 10:02:15.470912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f4b6a9c13'
+down_revision: Union[str, None] = '3a9c1e5d7b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_prayer_notifications_due', 'prayer_notifications', ['scheduled_time'], unique=False,
+                    postgresql_where=sa.text('NOT is_sent'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prayer_notifications_due', table_name='prayer_notifications')
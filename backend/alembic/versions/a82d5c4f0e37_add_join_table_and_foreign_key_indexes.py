@@ -0,0 +1,52 @@
+"""add join table and foreign key indexes
+
+Revision ID: a82d5c4f0e37
+Revises: 7b3e9f1c2a64
+Create Date: 2026-10-19 15:40:36.215874
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a82d5c4f0e37'
+down_revision: Union[str, None] = '7b3e9f1c2a64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_prayer_wall_users_wall_user', 'prayer_wall_users', ['prayer_wall_id', 'user_id'], None),
+    ('ix_prayer_verse_recommendations_prayer_id', 'prayer_verse_recommendations', ['prayer_id'], None),
+    ('ix_device_tokens_user_active', 'device_tokens', ['user_id'], 'is_active'),
+    ('ix_reactions_prayer_wall', 'reactions', ['prayer_id', 'prayer_wall_id'], None),
+    ('ix_prayer_walls_owner_id', 'prayer_walls', ['owner_id'], None),
+    ('ix_prayer_wall_invites_wall_id', 'prayer_wall_invites', ['wall_id'], None),
+]
+
+# Prefixes of a composite index, only cost writes now
+REDUNDANT_INDEXES = [
+    ('ix_prayers_user_id', 'prayers', ['user_id']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction, and doesn't block writes
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True,
+                            postgresql_where=sa.text(where) if where else None)
+        for name, table, columns in REDUNDANT_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in REDUNDANT_INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        for name, table, columns, where in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
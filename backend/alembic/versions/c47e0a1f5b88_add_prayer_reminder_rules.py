@@ -0,0 +1,54 @@
+"""add prayer reminder rules
+
+Revision ID: c47e0a1f5b88
+Revises: 8d2f4b6a9c13
+Create Date: 2026-10-19 11:20:08.264530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47e0a1f5b88'
+down_revision: Union[str, None] = '8d2f4b6a9c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('prayer_reminder_rules',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('prayer_id', sa.String(), nullable=True),
+    sa.Column('rrule', sa.String(), nullable=False),
+    sa.Column('timezone', sa.String(), nullable=False),
+    sa.Column('starts_at', sa.DateTime(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('expanded_until', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['prayer_id'], ['prayers.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_prayer_reminder_rules_user_id'), 'prayer_reminder_rules', ['user_id'], unique=False)
+    op.create_index('ix_prayer_reminder_rules_expand', 'prayer_reminder_rules', ['expanded_until'], unique=False,
+                    postgresql_where=sa.text('is_active'))
+
+    op.add_column('prayer_notifications', sa.Column('rule_id', sa.String(), nullable=True))
+    op.create_foreign_key('prayer_notifications_rule_id_fkey', 'prayer_notifications', 'prayer_reminder_rules',
+                          ['rule_id'], ['id'])
+    op.create_unique_constraint('uq_prayer_notifications_rule_time', 'prayer_notifications',
+                                ['rule_id', 'scheduled_time'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_prayer_notifications_rule_time', 'prayer_notifications', type_='unique')
+    op.drop_constraint('prayer_notifications_rule_id_fkey', 'prayer_notifications', type_='foreignkey')
+    op.drop_column('prayer_notifications', 'rule_id')
+    op.drop_index('ix_prayer_reminder_rules_expand', table_name='prayer_reminder_rules',
+                  postgresql_where=sa.text('is_active'))
+    op.drop_index(op.f('ix_prayer_reminder_rules_user_id'), table_name='prayer_reminder_rules')
+    op.drop_table('prayer_reminder_rules')
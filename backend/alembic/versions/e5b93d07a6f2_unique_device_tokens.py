@@ -0,0 +1,38 @@
+"""unique device tokens
+
+Revision ID: e5b93d07a6f2
+Revises: c47e0a1f5b88
+Create Date: 2026-10-19 12:05:51.903117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b93d07a6f2'
+down_revision: Union[str, None] = 'c47e0a1f5b88'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep one row per (user_id, device_token): an active one if there is one, then the most recently used
+    op.execute("""
+        DELETE FROM device_tokens
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY user_id, device_token
+                ORDER BY is_active DESC NULLS LAST, last_used DESC NULLS LAST, created_at DESC NULLS LAST
+            ) AS position
+            FROM device_tokens
+        ) AS ranked
+        WHERE device_tokens.id = ranked.id AND ranked.position > 1
+    """)
+    op.create_unique_constraint('uq_device_tokens_user_token', 'device_tokens', ['user_id', 'device_token'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_device_tokens_user_token', 'device_tokens', type_='unique')
@@ -19,12 +19,144 @@ depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade() -> None:
+    # The tables that existed before the first schema change went through alembic
     # ### commands auto generated by Alembic - please adjust! ###
-    pass
+    op.create_table('users',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('provider', sa.String(), nullable=False),
+    sa.Column('provider_id', sa.String(), nullable=False),
+    sa.Column('profile_picture', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_table('device_tokens',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('device_token', sa.String(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('prayer_walls',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('owner_id', sa.String(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('is_public', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_prayer_walls_id'), 'prayer_walls', ['id'], unique=False)
+    op.create_table('prayers',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('transcription', sa.Text(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('synopsis', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('prayer_type', sa.Enum('thanksgiving', 'worship', 'request', name='prayertype'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('is_answered', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_prayers_id'), 'prayers', ['id'], unique=False)
+    op.create_index(op.f('ix_prayers_user_id'), 'prayers', ['user_id'], unique=False)
+    op.create_table('prayer_notifications',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('prayer_id', sa.String(), nullable=True),
+    sa.Column('scheduled_time', sa.DateTime(), nullable=False),
+    sa.Column('is_sent', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['prayer_id'], ['prayers.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_prayer_notifications_id'), 'prayer_notifications', ['id'], unique=False)
+    op.create_table('prayer_verse_recommendations',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('prayer_id', sa.String(), nullable=False),
+    sa.Column('book_name', sa.String(), nullable=False),
+    sa.Column('chapter_number', sa.Integer(), nullable=False),
+    sa.Column('verse_number_start', sa.Integer(), nullable=False),
+    sa.Column('verse_number_end', sa.Integer(), nullable=True),
+    sa.Column('verse_text', sa.Text(), nullable=False),
+    sa.Column('encouragement', sa.Text(), nullable=False),
+    sa.Column('relevance_score', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['prayer_id'], ['prayers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_prayer_verse_recommendations_id'), 'prayer_verse_recommendations', ['id'], unique=False)
+    op.create_table('prayer_wall_invites',
+    sa.Column('code', sa.String(length=36), nullable=False),
+    sa.Column('wall_id', sa.String(length=36), nullable=False),
+    sa.Column('created_by', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['wall_id'], ['prayer_walls.id'], ),
+    sa.PrimaryKeyConstraint('code')
+    )
+    op.create_table('prayer_wall_prayers',
+    sa.Column('prayer_id', sa.String(), nullable=False),
+    sa.Column('prayer_wall_id', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['prayer_id'], ['prayers.id'], ),
+    sa.ForeignKeyConstraint(['prayer_wall_id'], ['prayer_walls.id'], ),
+    sa.PrimaryKeyConstraint('prayer_id', 'prayer_wall_id')
+    )
+    op.create_table('prayer_wall_users',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('prayer_wall_id', sa.String(), nullable=False),
+    sa.Column('role', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['prayer_wall_id'], ['prayer_walls.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'prayer_wall_id')
+    )
+    op.create_table('reactions',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('prayer_id', sa.String(), nullable=False),
+    sa.Column('prayer_wall_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('emoji', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['prayer_id'], ['prayers.id'], ),
+    sa.ForeignKeyConstraint(['prayer_wall_id'], ['prayer_walls.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reactions_id'), 'reactions', ['id'], unique=False)
     # ### end Alembic commands ###
 
 
 def downgrade() -> None:
     # ### commands auto generated by Alembic - please adjust! ###
-    pass
+    op.drop_index(op.f('ix_reactions_id'), table_name='reactions')
+    op.drop_table('reactions')
+    op.drop_table('prayer_wall_users')
+    op.drop_table('prayer_wall_prayers')
+    op.drop_table('prayer_wall_invites')
+    op.drop_index(op.f('ix_prayer_verse_recommendations_id'), table_name='prayer_verse_recommendations')
+    op.drop_table('prayer_verse_recommendations')
+    op.drop_index(op.f('ix_prayer_notifications_id'), table_name='prayer_notifications')
+    op.drop_table('prayer_notifications')
+    op.drop_index(op.f('ix_prayers_user_id'), table_name='prayers')
+    op.drop_index(op.f('ix_prayers_id'), table_name='prayers')
+    op.drop_table('prayers')
+    op.drop_index(op.f('ix_prayer_walls_id'), table_name='prayer_walls')
+    op.drop_table('prayer_walls')
+    op.drop_table('device_tokens')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    # Postgres keeps the enum type after its table is dropped
+    sa.Enum(name='prayertype').drop(op.get_bind())
     # ### end Alembic commands ###
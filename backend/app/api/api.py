@@ -1,11 +1,12 @@
 from fastapi import APIRouter
-from .routes import auth, prayers, prayer_walls, notifications
+from .routes import auth, prayers, prayer_walls, notifications, metrics
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(prayers.router, prefix="/prayers", tags=["prayers"])
 api_router.include_router(prayer_walls.router, prefix="/prayer-walls", tags=["prayer walls"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
 # api_router.include_router(documents.router, prefix="/documents", tags=["documents"])
 # api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
 # # api_router.include_router(tag.router, prefix="/tag", tags=["tag"])
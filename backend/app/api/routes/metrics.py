@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends
+
+from app.config.llm import chat_limiter, embedding_limiter, llm_resilience
+from app.config.apple_push import apns_client
+from app.services.cache import CACHES
+from app.services.auth import get_current_principal
+from app.services.notification_outbox import notification_dispatcher
+from app.services.reminders import reminder_scheduler
+
+# Queue depths and upstream latency are not for anonymous callers
+router = APIRouter(dependencies=[Depends(get_current_principal)])
+
+@router.get("/llm")
+async def get_llm_metrics():
+    return {
+        "rate_limits": {
+            "chat": chat_limiter.metrics(),
+            "embeddings": embedding_limiter.metrics(),
+        },
+        "resilience": llm_resilience.metrics(),
+    }
+
+@router.get("/caches")
+async def get_cache_metrics():
+    return {name: cache.metrics() for name, cache in CACHES.items()}
+
+@router.get("/push")
+async def get_push_metrics():
+    return {
+        "apns": apns_client.metrics(),
+        "outbox": notification_dispatcher.metrics(),
+        "reminders": reminder_scheduler.metrics(),
+    }
@@ -1,3 +1,5 @@
+from typing import List
+
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -5,7 +7,12 @@ from app.models import User
 from app.db.database import get_db
 from app.services.auth import get_current_user
 from app.services.notifications import register_device_token
-from app.schemas.notifications import DeviceTokenCreate
+from app.services.reminders import (
+    process_create_reminder_rule,
+    process_get_reminder_rules,
+    process_delete_reminder_rule
+)
+from app.schemas.notifications import DeviceTokenCreate, ReminderRuleCreate, ReminderRuleResponse
 from app.schemas.api import Message
 
 router = APIRouter()
@@ -16,4 +23,27 @@ async def register_device(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return await register_device_token(token.device_token, db, current_user) 
\ No newline at end of file
+    return await register_device_token(token.device_token, db, current_user) 
+
+@router.post("/reminders", response_model=ReminderRuleResponse)
+async def create_reminder(
+    rule: ReminderRuleCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await process_create_reminder_rule(rule, db, current_user)
+
+@router.get("/reminders", response_model=List[ReminderRuleResponse])
+async def get_reminders(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await process_get_reminder_rules(db, current_user)
+
+@router.delete("/reminders/{rule_id}", response_model=Message)
+async def delete_reminder(
+    rule_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await process_delete_reminder_rule(rule_id, db, current_user)
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from app.models import User
 from app.db.database import get_db
 from app.services.auth import get_current_user
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.schemas.prayers import PrayersPage
 
 from app.schemas.prayer_walls import (PrayerWallCreate, 
                                      PrayerWallUpdate, 
@@ -31,13 +33,24 @@ async def create_prayer_wall(prayer_wall: PrayerWallCreate, db: AsyncSession = D
 async def get_prayer_walls(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
     return await process_get_prayer_walls(db, current_user)
 
-@router.get("/{wall_id}/prayers")
+@router.get("/{wall_id}/prayers", response_model=PrayersPage)
 async def get_wall_prayers(
     wall_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return await process_get_wall_prayers(wall_id, db, current_user)
+    return await process_get_wall_prayers(wall_id, db, current_user, limit, cursor)
+
+@router.put("/{wall_id}")
+async def update_prayer_wall(
+    wall_id: str,
+    prayer_wall: PrayerWallUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await process_update_prayer_wall(wall_id, prayer_wall, db, current_user)
 
 @router.delete("/{wall_id}")
 async def delete_prayer_wall(
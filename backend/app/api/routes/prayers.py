@@ -1,23 +1,31 @@
-from fastapi import APIRouter, Depends, Request, UploadFile, File
+from fastapi import APIRouter, Depends, Query, Request, UploadFile, File, WebSocket
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from app.models import User
 from app.db.database import get_db
-from app.services.auth import get_current_user
+from app.services.auth import UserPrincipal, get_current_principal, get_current_user, get_current_user_ws
+from app.services.live_transcription import LiveTranscriber, get_live_transcriber
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 from app.schemas.prayers import (PrayerCreate, 
                                  PrayerUpdate, 
                                  PrayerDelete, 
                                  PrayerText,
                                  ParsedPrayer,
-                                 PrayerResponse)
+                                 PrayerResponse,
+                                 PrayersPage)
 from app.services.prayers import (process_create_prayer, 
                                   process_get_prayers, 
                                   process_update_prayer, 
                                   process_delete_prayer,
                                   process_text_prayers,
+                                  process_text_prayers_stream,
                                   process_audio_prayers,
+                                  process_live_audio_prayers,
+                                  process_audio_pipeline,
+                                  process_confirm_pipeline,
                                   process_bulk_create_prayer,
                                   process_share_prayer_to_walls,
                                   process_remove_prayer_from_wall,
@@ -30,9 +38,14 @@ router = APIRouter()
 async def create_prayer(prayer: PrayerCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
     return await process_create_prayer(prayer, db, current_user)
 
-@router.get("")
-async def get_prayers(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return await process_get_prayers(db, current_user)
+@router.get("", response_model=PrayersPage)
+async def get_prayers(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await process_get_prayers(db, current_user, limit, cursor)
 
 @router.put("/{prayer_id}")
 async def update_prayer(prayer_id: str, prayer: PrayerUpdate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -43,13 +56,39 @@ async def delete_prayer(prayer_id: str, db: AsyncSession = Depends(get_db), curr
     return await process_delete_prayer(prayer_id, db)
 
 @router.post("/process-text")
-async def process_text(prayer: PrayerText, current_user: User = Depends(get_current_user)):
+async def process_text(prayer: PrayerText, current_user: UserPrincipal = Depends(get_current_principal)):
     return await process_text_prayers(prayer)
 
+@router.post("/process-text/stream")
+async def process_text_stream(prayer: PrayerText, current_user: UserPrincipal = Depends(get_current_principal)):
+    return StreamingResponse(process_text_prayers_stream(prayer), media_type="application/x-ndjson")
+
 @router.post("/process-audio")
-async def process_audio(prayer_audio: UploadFile = File(...), current_user: User = Depends(get_current_user)):
+async def process_audio(prayer_audio: UploadFile = File(...), current_user: UserPrincipal = Depends(get_current_principal)):
     
-    return await process_audio_prayers(prayer_audio)
+    return await process_audio_prayers(prayer_audio, current_user)
+
+@router.post("/process-audio/pipeline")
+async def process_audio_pipeline_stream(
+    prayer_audio: UploadFile = File(...),
+    confirm: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    return await process_audio_pipeline(prayer_audio, current_user, confirm)
+
+@router.post("/pipeline/confirm")
+async def confirm_pipeline_prayers(prayers: List[ParsedPrayer], current_user: User = Depends(get_current_user)):
+    return await process_confirm_pipeline(prayers, current_user)
+
+@router.websocket("/process-audio/live")
+async def process_audio_live(
+    websocket: WebSocket,
+    encoding: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+    current_user: User = Depends(get_current_user_ws),
+    transcriber: LiveTranscriber = Depends(get_live_transcriber)
+):
+    await process_live_audio_prayers(websocket, transcriber, encoding, sample_rate)
 
 @router.post("/bulk-create-prayers")
 async def bulk_create_prayers(prayers: List[ParsedPrayer], db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -1,11 +1,19 @@
+import asyncio
+import enum
 import jwt
+from dataclasses import dataclass
+from typing import Optional
 from datetime import datetime, timedelta, timezone
+import h2.events
 import httpx
 from app.config import config
 import uuid
+import random
+import threading
+import time
 import logging
 
-APPLE_PUSH_URL = "https://api.push.apple.com" # Use api.development.push.apple.com for dev
+APPLE_PUSH_URL = config.APPLE_PUSH_URL
 TEAM_ID = config.APPLE_TEAM_ID
 KEY_ID = config.APPLE_KEY_ID
 BUNDLE_ID = config.APPLE_BUNDLE_ID
@@ -38,13 +46,234 @@ def create_push_notification_auth_token():
     except Exception as e:
         raise Exception(f"Failed to create Apple Push auth token: {str(e)}")
 
+class ProviderTokenManager:
+    """
+    Caches the signed APNs provider token. Apple expects one token to be reused
+    for up to an hour and rejects refreshes more often than every 20 minutes,
+    so the token is rotated on a schedule (rotate_after) or when Apple reports
+    it expired, but never twice within min_rotation_interval. Thread-safe.
+    """
+
+    def __init__(self, rotate_after: float = 50 * 60, min_rotation_interval: float = 20 * 60,
+                 signer=create_push_notification_auth_token):
+        self.rotate_after = rotate_after
+        self.min_rotation_interval = min_rotation_interval
+        self.signer = signer
+        self._token = None
+        self._issued_at = 0.0
+        self._lock = threading.Lock()
+        self.rotations = 0
+
+    def _rotate(self):
+        self._token = self.signer()
+        self._issued_at = time.monotonic()
+        self.rotations += 1
+        logger.info("Rotated APNs provider token")
+
+    def get_token(self) -> str:
+        token = self._token
+        if token is not None and time.monotonic() - self._issued_at < self.rotate_after:
+            return token
+        with self._lock:
+            # Another caller may have rotated while we waited for the lock
+            if self._token is None or time.monotonic() - self._issued_at >= self.rotate_after:
+                self._rotate()
+            return self._token
+
+    def token_expired(self, token: str) -> str:
+        """Handle ExpiredProviderToken for token and return the token to retry with"""
+        with self._lock:
+            if token == self._token and time.monotonic() - self._issued_at >= self.min_rotation_interval:
+                self._rotate()
+            elif token == self._token:
+                logger.warning("APNs reported an expired provider token that is too new to rotate")
+            return self._token
+
+
+provider_tokens = ProviderTokenManager()
+
+def get_push_notification_auth_token() -> str:
+    """The current provider token, signed at most once per rotation period"""
+    return provider_tokens.get_token()
+
+
+# Connection-level failures that may be safe to retry on a fresh connection, see never_processed
+RECONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+
+def never_processed(error: httpx.TransportError) -> bool:
+    """
+    Whether APNs certainly never acted on the request that failed, so sending it again
+    can't deliver the push twice. Read and write errors don't qualify: the request may
+    have reached Apple before the connection broke.
+    """
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+        return True
+    # httpcore already moves streams above a GOAWAY's last-stream-id to another
+    # connection itself. A GOAWAY that gets here covers this stream, unless Apple
+    # processed no streams on the connection at all.
+    cause = error.__cause__
+    terminated = cause.args[0] if cause is not None and cause.args else None
+    return isinstance(terminated, h2.events.ConnectionTerminated) and not terminated.last_stream_id
+
+
+class APNsClient:
+    """
+    Long-lived HTTP/2 client for the APNs provider API, one per worker process.
+
+    Concurrent pushes are multiplexed as streams over a few persistent connections
+    instead of a new TLS handshake per push. Before reuse, idle connections are
+    checked for having been closed by Apple and dropped after keepalive_expiry.
+    A push that fails before Apple can have seen it (no connection, or a GOAWAY
+    covering none of its streams) is retried on a fresh connection; any other
+    connection error goes back to the caller, whose outbox retry is idempotent. If
+    the pool stops handing out connections at all, the client is rebuilt. Cleartext URLs (a local stub) use HTTP/2 prior knowledge.
+    """
+
+    def __init__(self, base_url: str, max_connections: int, keepalive_expiry: float,
+                 timeout: float = 10.0, max_attempts: int = 3):
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self._client: httpx.AsyncClient = None
+        self._lock = asyncio.Lock()
+        self._retired = set()
+        self.reconnects = 0
+        self.resets = 0
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=True,
+            # APNs only speaks HTTP/2; over cleartext that means prior knowledge
+            http1=not self.base_url.startswith("http://"),
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections,
+                                keepalive_expiry=self.keepalive_expiry),
+        )
+
+    async def start(self):
+        async with self._lock:
+            if self._client is None:
+                self._client = self._create_client()
+
+    async def stop(self):
+        async with self._lock:
+            if self._client is not None:
+                await self._client.aclose()
+                self._client = None
+
+    async def _reset(self, client: httpx.AsyncClient):
+        """Swap in a new client unless another request already did; the old one closes once its pushes are done"""
+        async with self._lock:
+            if self._client is not client:
+                return
+            logger.warning("Resetting APNs connection pool")
+            self._client = self._create_client()
+            self.resets += 1
+
+        async def retire():
+            await asyncio.sleep(self.timeout)
+            await client.aclose()
+
+        task = asyncio.create_task(retire())
+        self._retired.add(task)
+        task.add_done_callback(self._retired.discard)
+
+    async def post(self, path: str, payload: dict, headers: dict) -> httpx.Response:
+        if self._client is None:
+            await self.start()
+        for attempt in range(1, self.max_attempts + 1):
+            client = self._client
+            try:
+                return await client.post(path, json=payload, headers=headers)
+            except RECONNECT_ERRORS as e:
+                if not never_processed(e):
+                    raise
+                # The pool drops the dead connection itself, the retry opens a new one
+                self.reconnects += 1
+                logger.info(f"APNs connection error on attempt {attempt}: {type(e).__name__}: {e}")
+                if attempt == self.max_attempts:
+                    raise
+                # Spread out the pushes that were all cut off by the same GOAWAY
+                await asyncio.sleep(random.uniform(0, 0.1 * attempt))
+            except httpx.PoolTimeout:
+                await self._reset(client)
+                if attempt == self.max_attempts:
+                    raise
+
+    def metrics(self) -> dict:
+        return {
+            "connected": self._client is not None,
+            "reconnects": self.reconnects,
+            "resets": self.resets,
+        }
+
+
+def _apns_reason(response: httpx.Response):
+    try:
+        return response.json().get("reason")
+    except ValueError:
+        return None
+
+
+class PushStatus(str, enum.Enum):
+    DELIVERED = "delivered"
+    INVALID_TOKEN = "invalid_token"  # The device token will never work again, stop using it
+    RETRYABLE = "retryable"          # Throttling, APNs trouble or the network, try again later
+    REJECTED = "rejected"            # Payload or configuration problem, retrying won't help
+
+
+# Reasons from Apple's "Handling notification responses from APNs"
+INVALID_TOKEN_REASONS = {"BadDeviceToken", "Unregistered", "DeviceTokenNotForTopic", "ExpiredToken"}
+RETRYABLE_REASONS = {"TooManyRequests", "InternalServerError", "ServiceUnavailable", "Shutdown",
+                     "IdleTimeout", "ExpiredProviderToken"}
+
+
+@dataclass
+class PushOutcome:
+    status: PushStatus
+    status_code: Optional[int] = None
+    reason: Optional[str] = None
+
+
+def classify_response(response: httpx.Response) -> PushOutcome:
+    """Map an APNs response to what the caller should do about the device token"""
+    if response.status_code == 200:
+        return PushOutcome(PushStatus.DELIVERED, 200)
+    reason = _apns_reason(response)
+    if response.status_code == 410 or reason in INVALID_TOKEN_REASONS:
+        status = PushStatus.INVALID_TOKEN
+    elif response.status_code in (429, 500, 503) or reason in RETRYABLE_REASONS:
+        status = PushStatus.RETRYABLE
+    else:
+        status = PushStatus.REJECTED
+    return PushOutcome(status, response.status_code, reason)
+
+
+class APNsError(Exception):
+    """A push that APNs did not accept, outcome says whether the token or the request is at fault"""
+
+    def __init__(self, message: str, outcome: PushOutcome):
+        super().__init__(message)
+        self.outcome = outcome
+
+
+apns_client = APNsClient(APPLE_PUSH_URL, config.APNS_MAX_CONNECTIONS, config.APNS_KEEPALIVE_SECONDS)
+
 async def send_push_notification(
     device_token: str,
     title: str,
     body: str,
-    auth_token: str
+    auth_token: str = None
 ):
-    """Send push notification to Apple Push Notification service"""
+    """
+    Send push notification to Apple Push Notification service.
+    Uses the cached provider token unless auth_token is given.
+    """
     try:
         # Clean device token - remove any spaces or special characters
         # Ensure we have a valid hex string without any UUID formatting
@@ -58,8 +287,12 @@ async def send_push_notification(
                 logger.warning(f"Device token length is {len(device_token)}, expected 64 characters")
         except ValueError:
             logger.error(f"Invalid device token format: {device_token[:8]}...")
-            raise ValueError(f"Device token is not a valid hex string: {device_token[:8]}...")
+            raise APNsError(f"Device token is not a valid hex string: {device_token[:8]}...",
+                            PushOutcome(PushStatus.INVALID_TOKEN, reason="BadDeviceToken"))
         
+        if auth_token is None:
+            auth_token = provider_tokens.get_token()
+
         # Properly formatted headers according to Apple's documentation
         headers = {
             'Authorization': f'Bearer {auth_token}',
@@ -83,26 +316,34 @@ async def send_push_notification(
         }
         
         # Construct URL with properly formatted device token
-        url = f"{APPLE_PUSH_URL}/3/device/{device_token}"
+        url = f"/3/device/{device_token}"
         
         # Log request details for debugging
         logger.debug(f"Sending push notification to: {url}")
         logger.debug(f"Headers: {headers}")
         logger.debug(f"Payload: {payload}")
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
-            
-            if response.status_code == 200:
-                logger.info(f"Successfully sent notification to device: {device_token[:8]}...")
-                return response
-            else:
-                error_msg = f"Push notification failed: {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
+        response = await apns_client.post(url, payload, headers)
+
+        if response.status_code == 403 and _apns_reason(response) == "ExpiredProviderToken":
+            auth_token = provider_tokens.token_expired(auth_token)
+            headers['Authorization'] = f'Bearer {auth_token}'
+            headers['apns-id'] = str(uuid.uuid4())
+            response = await apns_client.post(url, payload, headers)
+
+        outcome = classify_response(response)
+        if outcome.status == PushStatus.DELIVERED:
+            logger.info(f"Successfully sent notification to device: {device_token[:8]}...")
+            return response
+        else:
+            error_msg = f"Push notification failed: {response.status_code} - {response.text}"
+            logger.error(error_msg)
+            raise APNsError(error_msg, outcome)
+    except APNsError:
+        raise
     except httpx.RequestError as e:
         logger.error(f"Request error for device {device_token[:8] if len(device_token) >= 8 else device_token}...: {str(e)}")
-        raise Exception(f"Request error: {str(e)}")
+        raise APNsError(f"Request error: {str(e)}", PushOutcome(PushStatus.RETRYABLE))
     except Exception as e:
         logger.error(f"Push notification error for device {device_token[:8] if len(device_token) >= 8 else device_token}...: {str(e)}")
         raise Exception(f"Push notification error: {str(e)}") 
\ No newline at end of file
@@ -7,14 +7,65 @@ load_dotenv()
 class Config:
     HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # Point at a local stand-in for load testing
+    # Token-length checks download tiktoken encodings; turn off when running fully offline
+    OPENAI_EMBEDDING_CHECK_CTX_LENGTH = os.getenv("OPENAI_EMBEDDING_CHECK_CTX_LENGTH", "true").lower() == "true"
     DATABASE_URL = os.getenv("DATABASE_URL")
     ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
     JWT_SECRET = os.getenv("JWT_SECRET")
+    # Authenticated user lookups; a deactivation reaches other workers within the TTL
+    USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+    USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    # Invite link previews; joins and edits elsewhere show up within the TTL
+    INVITE_PREVIEW_CACHE_MAX_ENTRIES = int(os.getenv("INVITE_PREVIEW_CACHE_MAX_ENTRIES", "10000"))
+    INVITE_PREVIEW_CACHE_TTL_SECONDS = float(os.getenv("INVITE_PREVIEW_CACHE_TTL_SECONDS", "30"))
     WEAVIATE_URL = os.getenv("WEAVIATE_URL")
+    VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "weaviate")  # "weaviate" or "memory"
     APPLE_TEAM_ID = os.getenv("APPLE_TEAM_ID")
     APPLE_KEY_ID = os.getenv("APPLE_KEY_ID")
     APPLE_BUNDLE_ID = os.getenv("APPLE_BUNDLE_ID")
     APPLE_PRIVATE_KEY = os.getenv("APPLE_PRIVATE_KEY")
+    APPLE_PUSH_URL = os.getenv("APPLE_PUSH_URL", "https://api.push.apple.com")  # api.development.push.apple.com for dev
+    APNS_MAX_CONNECTIONS = int(os.getenv("APNS_MAX_CONNECTIONS", "2"))
+    PUSH_FANOUT_CONCURRENCY = int(os.getenv("PUSH_FANOUT_CONCURRENCY", "256"))
+    APNS_KEEPALIVE_SECONDS = float(os.getenv("APNS_KEEPALIVE_SECONDS", "600"))
+    # Background delivery of queued notifications (notification_outbox)
+    OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() == "true"
+    OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    OUTBOX_BASE_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BASE_BACKOFF_SECONDS", "5"))
+    OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "3600"))
+    # Wall activity for a user is held this long and merged into one digest push, 0 sends each event
+    NOTIFICATION_COALESCE_SECONDS = float(os.getenv("NOTIFICATION_COALESCE_SECONDS", "120"))
+    # Delivery of scheduled PrayerNotification reminders
+    REMINDERS_ENABLED = os.getenv("REMINDERS_ENABLED", "true").lower() == "true"
+    REMINDER_POLL_SECONDS = float(os.getenv("REMINDER_POLL_SECONDS", "5"))
+    REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "2000"))
+    # How far ahead recurring reminders are expanded into PrayerNotification rows
+    REMINDER_EXPANSION_WINDOW_HOURS = float(os.getenv("REMINDER_EXPANSION_WINDOW_HOURS", "24"))
     DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
+    DEEPGRAM_URL = os.getenv("DEEPGRAM_URL", "https://api.deepgram.com")
+    DEEPGRAM_TIMEOUT_SECONDS = float(os.getenv("DEEPGRAM_TIMEOUT_SECONDS", "120"))
+    # Repeat uploads of the same recording (e.g. client retries) reuse earlier results
+    AUDIO_CACHE_MAX_ENTRIES = int(os.getenv("AUDIO_CACHE_MAX_ENTRIES", "512"))
+    AUDIO_CACHE_TTL_SECONDS = float(os.getenv("AUDIO_CACHE_TTL_SECONDS", "3600"))
+    AUDIO_CACHE_PARSED_PRAYERS = os.getenv("AUDIO_CACHE_PARSED_PRAYERS", "true").lower() == "true"
+    # How long speculative recommendations wait for a confirm in the audio pipeline
+    PIPELINE_PENDING_TTL_SECONDS = float(os.getenv("PIPELINE_PENDING_TTL_SECONDS", "900"))
+    PIPELINE_SPECULATIVE_RECOMMENDATIONS = os.getenv("PIPELINE_SPECULATIVE_RECOMMENDATIONS", "true").lower() == "true"
+    MAX_AUDIO_UPLOAD_BYTES = int(os.getenv("MAX_AUDIO_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+    EMBEDDING_ARTIFACT_DIR = os.getenv("EMBEDDING_ARTIFACT_DIR")
+    PRAYER_CHUNK_MAX_CHARS = int(os.getenv("PRAYER_CHUNK_MAX_CHARS", "6000"))
+    PRAYER_CHUNK_CONCURRENCY = int(os.getenv("PRAYER_CHUNK_CONCURRENCY", "4"))
+    # OpenAI quota available to each worker process
+    OPENAI_CHAT_RPM = int(os.getenv("OPENAI_CHAT_RPM", "500"))
+    OPENAI_CHAT_TPM = int(os.getenv("OPENAI_CHAT_TPM", "200000"))
+    OPENAI_EMBEDDING_RPM = int(os.getenv("OPENAI_EMBEDDING_RPM", "3000"))
+    OPENAI_EMBEDDING_TPM = int(os.getenv("OPENAI_EMBEDDING_TPM", "1000000"))
+    LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "30"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
 
 config = Config()
\ No newline at end of file
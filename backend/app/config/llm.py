@@ -1,10 +1,152 @@
 # from langchain_huggingface import HuggingFaceEmbeddings
+import asyncio
+import openai
 from langchain_community.embeddings import HuggingFaceInferenceAPIEmbeddings
 from langchain_weaviate.vectorstores import WeaviateVectorStore
 from langchain_core.documents import Document
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from app.config import config
+from app.config.rate_limiter import TokenBucketRateLimiter, current_priority, estimate_tokens, llm_priority
+from app.config.llm_resilience import ResiliencePolicy
 
-oai_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-langchain_embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
\ No newline at end of file
+# Default allowance for the completion when a call does not set max_tokens
+COMPLETION_TOKEN_ESTIMATE = 512
+
+chat_limiter = TokenBucketRateLimiter(
+    "chat",
+    requests_per_minute=config.OPENAI_CHAT_RPM,
+    tokens_per_minute=config.OPENAI_CHAT_TPM,
+)
+embedding_limiter = TokenBucketRateLimiter(
+    "embeddings",
+    requests_per_minute=config.OPENAI_EMBEDDING_RPM,
+    tokens_per_minute=config.OPENAI_EMBEDDING_TPM,
+)
+
+llm_resilience = ResiliencePolicy(
+    deadline=config.LLM_DEADLINE_SECONDS,
+    max_retries=config.LLM_MAX_RETRIES,
+    hedge_enabled=config.LLM_HEDGE_ENABLED,
+)
+
+
+def _call_key(kwargs) -> str:
+    """Name a chat call after its structured output schema so latencies are tracked per call type"""
+    response_format = kwargs.get("response_format")
+    if isinstance(response_format, dict):
+        return response_format.get("json_schema", {}).get("name", "chat")
+    if response_format is not None:
+        return getattr(response_format, "__name__", "chat")
+    tools = kwargs.get("tools") or []
+    names = [tool.get("function", {}).get("name", "") for tool in tools if isinstance(tool, dict)]
+    return ",".join(name for name in names if name) or "chat"
+
+
+class RateLimitedChatOpenAI(ChatOpenAI):
+    """
+    ChatOpenAI that runs every async request under the shared resilience policy
+    (deadline, hedging, jittered retry), paying the shared chat limiter per attempt.
+    """
+
+    def _estimate(self, messages) -> int:
+        prompt = "".join(str(message.content) for message in messages)
+        return estimate_tokens(prompt) + (self.max_tokens or COMPLETION_TOKEN_ESTIMATE)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        generate = super()._agenerate
+
+        async def attempt():
+            return await generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+        return await llm_resilience.call(_call_key(kwargs), attempt,
+                                         limiter=chat_limiter, tokens=self._estimate(messages))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        stream = super()._astream
+
+        async def attempt():
+            async for chunk in stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield chunk
+
+        async for chunk in llm_resilience.stream(_call_key(kwargs), attempt,
+                                                 limiter=chat_limiter, tokens=self._estimate(messages)):
+            yield chunk
+
+
+_event_loop: asyncio.AbstractEventLoop = None
+
+def bind_event_loop():
+    """
+    Make the running loop the one sync embedding calls are handed to. Vector stores
+    such as langchain_weaviate embed synchronously in executor threads; binding the
+    loop puts those calls under the same limiter and resilience policy as async ones.
+    """
+    global _event_loop
+    _event_loop = asyncio.get_running_loop()
+
+
+def _bound_loop_elsewhere():
+    """The bound loop, if it is running and this thread isn't the one running it"""
+    if _event_loop is None or not _event_loop.is_running():
+        return None
+    try:
+        if asyncio.get_running_loop() is _event_loop:
+            return None
+    except RuntimeError:
+        pass
+    return _event_loop
+
+
+class RateLimitedOpenAIEmbeddings(OpenAIEmbeddings):
+    """
+    OpenAIEmbeddings that runs every call under the shared resilience policy, paying
+    the shared embedding limiter per attempt. Sync calls from other threads are run
+    on the loop given to bind_event_loop; without one they go straight to the client.
+    """
+
+    async def aembed_documents(self, texts, chunk_size=None):
+        batch_size = chunk_size or self.chunk_size
+        embed = super().aembed_documents
+
+        async def attempt():
+            return await embed(texts, chunk_size=chunk_size)
+
+        return await llm_resilience.call(
+            "embeddings", attempt, limiter=embedding_limiter,
+            tokens=sum(estimate_tokens(text) for text in texts),
+            requests=max(1, -(-len(texts) // batch_size)),
+        )
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+    def embed_documents(self, texts, chunk_size=None):
+        loop = _bound_loop_elsewhere()
+        if loop is None:
+            return super().embed_documents(texts, chunk_size=chunk_size)
+        # The coroutine runs in a task of its own, so carry the caller's priority over
+        priority = current_priority()
+
+        async def embed():
+            with llm_priority(priority):
+                return await self.aembed_documents(texts, chunk_size=chunk_size)
+
+        return asyncio.run_coroutine_threadsafe(embed(), loop).result()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+# Retries and timeouts are owned by llm_resilience, so the OpenAI client's own are turned off.
+# The exception is the sync embeddings client: it is only used for sync calls with no bound
+# loop to hand them to, which the policy never sees, so it keeps the SDK's default retries.
+oai_llm = RateLimitedChatOpenAI(model="gpt-4o-mini", temperature=0, max_retries=0,
+                                timeout=config.LLM_DEADLINE_SECONDS, base_url=config.OPENAI_BASE_URL)
+langchain_embeddings = RateLimitedOpenAIEmbeddings(model="text-embedding-3-small", max_retries=0,
+                                                   timeout=config.LLM_DEADLINE_SECONDS,
+                                                   base_url=config.OPENAI_BASE_URL,
+                                                   check_embedding_ctx_length=config.OPENAI_EMBEDDING_CHECK_CTX_LENGTH,
+                                                   client=openai.OpenAI(base_url=config.OPENAI_BASE_URL,
+                                                                        timeout=config.LLM_DEADLINE_SECONDS).embeddings)
@@ -0,0 +1,187 @@
+import asyncio
+import random
+import time
+import logging
+from collections import defaultdict, deque
+
+import openai
+
+logging.basicConfig(format="%(levelname)s - %(name)s -  %(message)s", level=logging.WARNING)
+logging.getLogger("prayer-api").setLevel(logging.INFO)
+logger = logging.getLogger("prayer-api")
+
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies per call key"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, key: str, seconds: float):
+        self._samples[key].append(seconds)
+
+    def p95(self, key: str):
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[int(len(ordered) * 0.95)]
+
+
+class ResiliencePolicy:
+    """
+    Deadline, hedging and retry policy for outbound LLM calls.
+
+    Each call gets an overall deadline. Once a call runs longer than the observed
+    p95 for its key, a duplicate request is fired and whichever finishes first wins;
+    the other is cancelled. Retryable OpenAI errors are retried with full-jitter
+    exponential backoff while time remains before the deadline.
+
+    With a limiter, every attempt first waits for its budget. The wait counts against
+    the deadline but not towards the latency the hedge timer is based on, and a hedge
+    only fires if the limiter can pay for it without queueing.
+    """
+
+    def __init__(
+        self,
+        deadline: float,
+        max_retries: int,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge_enabled: bool = True,
+        hedge_min_samples: int = 20,
+    ):
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_enabled = hedge_enabled
+        self.latency = LatencyTracker(min_samples=hedge_min_samples)
+        self._counters = defaultdict(lambda: defaultdict(int))
+
+    def _count(self, key: str, counter: str):
+        self._counters[key][counter] += 1
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def call(self, key: str, factory, limiter=None, tokens: int = 0, requests: int = 1):
+        """
+        Run factory() (a coroutine function making one request) under the policy, paying
+        tokens and requests to limiter (a TokenBucketRateLimiter) for every attempt
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        self._count(key, "calls")
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.wait_for(
+                    self._attempt(key, factory, limiter, tokens, requests), deadline - loop.time()
+                )
+            except asyncio.TimeoutError:
+                self._count(key, "deadline_exceeded")
+                logger.warning(f"LLM call {key} exceeded its {self.deadline}s deadline")
+                raise
+            except RETRYABLE_ERRORS as e:
+                attempt += 1
+                delay = self._backoff(attempt)
+                if attempt > self.max_retries or loop.time() + delay >= deadline:
+                    self._count(key, "failures")
+                    raise
+                self._count(key, "retries")
+                logger.info(f"Retrying LLM call {key} in {delay:.2f}s after {type(e).__name__}")
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, key: str, factory, limiter, tokens: int, requests: int):
+        if limiter is not None:
+            await limiter.acquire(tokens, requests=requests)
+
+        def pay_for_hedge() -> bool:
+            return limiter is None or limiter.try_acquire(tokens, requests=requests)
+
+        return await self._hedged(key, factory, pay_for_hedge)
+
+    async def _hedged(self, key: str, factory, pay_for_hedge):
+        started = time.monotonic()
+        primary = asyncio.ensure_future(factory())
+        pending = {primary}
+        starts = {primary: started}
+        try:
+            hedge_after = self.latency.p95(key) if self.hedge_enabled else None
+            if hedge_after is not None:
+                done, _ = await asyncio.wait(pending, timeout=hedge_after)
+                if not done:
+                    if pay_for_hedge():
+                        self._count(key, "hedges")
+                        hedge = asyncio.ensure_future(factory())
+                        starts[hedge] = time.monotonic()
+                        pending.add(hedge)
+                    else:
+                        # Throttled: a duplicate would only add to the queue it is waiting out
+                        self._count(key, "hedges_throttled")
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.latency.record(key, time.monotonic() - starts[task])
+                        if task is not primary:
+                            self._count(key, "hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, key: str, factory, limiter=None, tokens: int = 0, requests: int = 1):
+        """
+        Stream chunks from factory() (an async generator function). Retries and the
+        deadline only apply until the first chunk arrives; streams are never hedged.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        self._count(key, "calls")
+        attempt = 0
+        while True:
+            chunks = factory()
+            try:
+                if limiter is not None:
+                    await asyncio.wait_for(limiter.acquire(tokens, requests=requests), deadline - loop.time())
+                first = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+                break
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                await chunks.aclose()
+                self._count(key, "deadline_exceeded")
+                raise
+            except RETRYABLE_ERRORS:
+                await chunks.aclose()
+                attempt += 1
+                delay = self._backoff(attempt)
+                if attempt > self.max_retries or loop.time() + delay >= deadline:
+                    self._count(key, "failures")
+                    raise
+                self._count(key, "retries")
+                await asyncio.sleep(delay)
+
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    def metrics(self) -> dict:
+        return {
+            key: {**counters, "p95_seconds": self.latency.p95(key)}
+            for key, counters in self._counters.items()
+        }
@@ -0,0 +1,176 @@
+import asyncio
+import heapq
+import itertools
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+
+logging.basicConfig(format="%(levelname)s - %(name)s -  %(message)s", level=logging.WARNING)
+logging.getLogger("prayer-api").setLevel(logging.INFO)
+logger = logging.getLogger("prayer-api")
+
+
+class Priority(IntEnum):
+    """Lower values are served first when callers are queued"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_current_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """Run every OpenAI call made inside this block (including spawned tasks) at the given priority"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+
+class _WaitStats:
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def snapshot(self) -> dict:
+        recent = sorted(self.recent)
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p95": recent[int(len(recent) * 0.95)] if recent else 0.0,
+            "max": self.max,
+        }
+
+
+class TokenBucketRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute token buckets with a priority queue.
+
+    Callers that cannot be served immediately wait in (priority, arrival) order, so
+    interactive calls always go ahead of queued background work. Limits apply to the
+    current process; divide the account quota by the number of workers.
+    """
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: int):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._timer = None
+        self._wait_stats = {priority: _WaitStats() for priority in Priority}
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _has_capacity(self, requests: int, tokens: int) -> bool:
+        return self._requests >= requests and self._tokens >= tokens
+
+    def _seconds_until(self, requests: int, tokens: int) -> float:
+        request_wait = (requests - self._requests) * 60 / self.requests_per_minute
+        token_wait = (tokens - self._tokens) * 60 / self.tokens_per_minute
+        return max(request_wait, token_wait, 0.001)
+
+    def _dispatch(self):
+        self._timer = None
+        self._refill()
+        while self._waiters:
+            _, _, requests, tokens, future = self._waiters[0]
+            if future.done():  # cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            if not self._has_capacity(requests, tokens):
+                delay = self._seconds_until(requests, tokens)
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._requests -= requests
+            self._tokens -= tokens
+            future.set_result(None)
+
+    async def acquire(self, tokens: int, priority: Priority = None, requests: int = 1):
+        """Wait until the request and token budget is available, then consume it"""
+        priority = current_priority() if priority is None else priority
+        # A single call larger than the whole bucket would otherwise wait forever
+        tokens = min(tokens, self.tokens_per_minute)
+        requests = min(requests, self.requests_per_minute)
+        started = time.monotonic()
+
+        self._refill()
+        if not self._waiters and self._has_capacity(requests, tokens):
+            self._requests -= requests
+            self._tokens -= tokens
+            self._wait_stats[priority].record(0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), requests, tokens, future))
+        if self._timer is not None:
+            self._timer.cancel()
+        self._dispatch()
+        try:
+            await future
+        finally:
+            waited = time.monotonic() - started
+            self._wait_stats[priority].record(waited)
+            if waited > 1:
+                logger.info(f"{self.name} rate limiter held {priority.name.lower()} call for {waited:.2f}s")
+
+    def try_acquire(self, tokens: int, requests: int = 1) -> bool:
+        """Consume the budget only if it is available now and nobody is queued ahead, never waits"""
+        tokens = min(tokens, self.tokens_per_minute)
+        requests = min(requests, self.requests_per_minute)
+        self._refill()
+        if self._waiters or not self._has_capacity(requests, tokens):
+            return False
+        self._requests -= requests
+        self._tokens -= tokens
+        return True
+
+    def queue_depth(self) -> dict:
+        depth = {priority.name.lower(): 0 for priority in Priority}
+        for priority, _, _, _, future in self._waiters:
+            if not future.done():
+                depth[Priority(priority).name.lower()] += 1
+        return depth
+
+    def metrics(self) -> dict:
+        self._refill()
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "available_requests": round(self._requests, 2),
+            "available_tokens": round(self._tokens, 2),
+            "queue_depth": self.queue_depth(),
+            "wait_seconds": {priority.name.lower(): stats.snapshot()
+                             for priority, stats in self._wait_stats.items()},
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough OpenAI token count (about four characters per token)"""
+    return len(text) // 4 + 1
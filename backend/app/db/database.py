@@ -2,9 +2,12 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from langchain_weaviate.vectorstores import WeaviateVectorStore
+from langchain_core.vectorstores import InMemoryVectorStore
 
 
+import asyncio
 import weaviate
+from langchain_core.documents import Document
 import logging
 
 from app.config import config
@@ -57,7 +60,52 @@ async def get_weaviate_client():
         logger.error(f"Error connecting to Weaviate: {e}")
         raise
 
-async def get_vector_store():
+class InMemoryTenantVectorStore:
+    """
+    In-process stand-in for the multi-tenant Weaviate store, used for local runs and
+    load testing. Each worker process holds its own copy.
+    """
+
+    def __init__(self, embedding):
+        self.embedding = embedding
+        self._tenants = {}
+
+    def tenant(self, name: str, embedding=None) -> InMemoryVectorStore:
+        if name not in self._tenants:
+            self._tenants[name] = InMemoryVectorStore(embedding or self.embedding)
+        return self._tenants[name]
+
+    async def aadd_documents(self, documents, tenant: str, **kwargs):
+        return await self.tenant(tenant).aadd_documents(documents, **kwargs)
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 4, tenant: str = None, **kwargs):
+        return await self.tenant(tenant).asimilarity_search_with_score(query, k=k, **kwargs)
+
+
+_memory_vector_store = None
+_memory_vector_store_lock = asyncio.Lock()
+
+async def get_memory_vector_store():
+    """Build the in-memory store once per process, seeding the Bible tenant from the embedding artifact"""
+    global _memory_vector_store
+    async with _memory_vector_store_lock:
+        if _memory_vector_store is None:
+            from app.services.embedding_artifact import load_embedding_artifact
+
+            store = InMemoryTenantVectorStore(langchain_embeddings)
+            if config.EMBEDDING_ARTIFACT_DIR:
+                artifact = load_embedding_artifact()
+                bible = store.tenant("Bible", embedding=artifact.as_embeddings(fallback=langchain_embeddings))
+                await bible.aadd_documents([
+                    Document(page_content=meta["text"], metadata=meta) for meta in artifact.metadata
+                ])
+                logger.info(f"Seeded in-memory Bible tenant with {len(artifact.metadata)} chunks")
+            _memory_vector_store = store
+    return _memory_vector_store
+
+async def get_vector_store(embedding=None):
+    if config.VECTOR_STORE_BACKEND == "memory":
+        return await get_memory_vector_store(), None
     try:
         client = weaviate.connect_to_custom(
             http_host=config.WEAVIATE_URL,
@@ -71,7 +119,7 @@ async def get_vector_store():
             client=client,
             index_name="node1",
             text_key="content",
-            embedding=langchain_embeddings,
+            embedding=embedding or langchain_embeddings,
             use_multi_tenancy=True
         )
         return vector_store, client
@@ -1,5 +1,6 @@
 from sqlalchemy import (
-    Column, String, Integer, Boolean, DateTime, ForeignKey, Table, func, Enum, Text, Float
+    Column, String, Integer, Boolean, DateTime, ForeignKey, Table, func, Enum, Text, Float, Index, text,
+    UniqueConstraint
 )
 from sqlalchemy.orm import relationship
 import enum
@@ -14,7 +15,10 @@ prayer_wall_prayers = Table(
     "prayer_wall_prayers",
     Base.metadata,
     Column("prayer_id", String, ForeignKey("prayers.id"), primary_key=True),
-    Column("prayer_wall_id", String, ForeignKey("prayer_walls.id"), primary_key=True)
+    Column("prayer_wall_id", String, ForeignKey("prayer_walls.id"), primary_key=True),
+    Column("created_at", DateTime, nullable=False, server_default=func.now()),  # When the prayer was shared
+    # Newest-first pages of a wall's prayers
+    Index("ix_prayer_wall_prayers_wall_created", "prayer_wall_id", "created_at", "prayer_id")
 )
 
 # Many-to-Many join table for sharing prayer walls with users (with roles)
@@ -23,7 +27,9 @@ prayer_wall_users = Table(
     Base.metadata,
     Column("user_id", String, ForeignKey("users.id"), primary_key=True),
     Column("prayer_wall_id", String, ForeignKey("prayer_walls.id"), primary_key=True),
-    Column("role", String, nullable=False)  # e.g., "owner", "member"
+    Column("role", String, nullable=False),  # e.g., "owner", "member"
+    # The primary key leads with user_id, this serves lookups of a wall's members
+    Index("ix_prayer_wall_users_wall_user", "prayer_wall_id", "user_id")
 )
 
 # Enum for prayer types
@@ -58,7 +64,7 @@ class Prayer(Base):
     __tablename__ = "prayers"
 
     id = Column(String, primary_key=True, index=True, default=generate_uuid)  # UUID
-    user_id = Column(String, ForeignKey("users.id"), index=True, nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)  # covered by ix_prayers_user_created
     transcription = Column(Text, nullable=False)  # Original spoken or typed prayer
     entity = Column(String, nullable=False)         # Extracted by LLM (e.g., "Family", "Job Opportunity")
     synopsis = Column(String, nullable=False)         # Concise summary (5-6 words)
@@ -78,13 +84,18 @@ class Prayer(Base):
 
     verse_recommendations = relationship("PrayerVerseRecommendation", back_populates="prayer")
 
+    __table_args__ = (
+        # Newest-first pages of a user's prayers
+        Index("ix_prayers_user_created", "user_id", "created_at", "id"),
+    )
+
 
 # PrayerWall model (private groups for sharing prayers)
 class PrayerWall(Base):
     __tablename__ = "prayer_walls"
 
     id = Column(String, primary_key=True, index=True, default=generate_uuid)  # UUID
-    owner_id = Column(String, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     description = Column(String, nullable=True)
     is_public = Column(Boolean, default=False)  # Defaults to private
@@ -101,7 +112,7 @@ class PrayerVerseRecommendation(Base):
     __tablename__ = "prayer_verse_recommendations"
     
     id = Column(String, primary_key=True, index=True, default=generate_uuid)
-    prayer_id = Column(String, ForeignKey("prayers.id"), nullable=False)
+    prayer_id = Column(String, ForeignKey("prayers.id"), nullable=False, index=True)
     
     # Split verse reference into components for better querying
     book_name = Column(String, nullable=False)
@@ -138,6 +149,10 @@ class Reaction(Base):
     prayer_wall = relationship("PrayerWall")
     user = relationship("User", back_populates="reactions")
 
+    __table_args__ = (
+        Index("ix_reactions_prayer_wall", "prayer_id", "prayer_wall_id"),
+    )
+
 
 # PrayerNotification model (for reminders and prayer notifications)
 class PrayerNotification(Base):
@@ -148,17 +163,44 @@ class PrayerNotification(Base):
     prayer_id = Column(String, ForeignKey("prayers.id"), nullable=True)  # Optional: linked to a specific prayer
     scheduled_time = Column(DateTime, nullable=False)
     is_sent = Column(Boolean, default=False)
+    rule_id = Column(String, ForeignKey("prayer_reminder_rules.id"), nullable=True)  # Set on occurrences of a recurring reminder
 
     user = relationship("User", back_populates="notifications")
     prayer = relationship("Prayer")
 
+    __table_args__ = (
+        # Expanding a rule twice never creates a second copy of an occurrence
+        UniqueConstraint("rule_id", "scheduled_time", name="uq_prayer_notifications_rule_time"),
+        # The reminder scheduler only scans reminders that are still waiting to go out
+        Index("ix_prayer_notifications_due", "scheduled_time", postgresql_where=text("NOT is_sent")),
+    )
+
+
+# Recurring reminder, stored once and expanded into PrayerNotification rows a short window ahead
+class PrayerReminderRule(Base):
+    __tablename__ = "prayer_reminder_rules"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    prayer_id = Column(String, ForeignKey("prayers.id"), nullable=True)
+    rrule = Column(String, nullable=False)  # e.g. "FREQ=WEEKLY;BYDAY=MO,WE;BYHOUR=7;BYMINUTE=0"
+    timezone = Column(String, nullable=False, default="UTC")  # IANA name the rule's times are in
+    starts_at = Column(DateTime, nullable=False)  # Local time in `timezone` the series starts from
+    is_active = Column(Boolean, nullable=False, default=True)
+    expanded_until = Column(DateTime, nullable=False, default=func.now())  # Occurrences exist up to here
+    created_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        Index("ix_prayer_reminder_rules_expand", "expanded_until", postgresql_where=text("is_active")),
+    )
+
 
 # PrayerWallInvite model
 class PrayerWallInvite(Base):
     __tablename__ = "prayer_wall_invites"
 
     code = Column(String(36), primary_key=True)
-    wall_id = Column(String(36), ForeignKey("prayer_walls.id"), nullable=False)
+    wall_id = Column(String(36), ForeignKey("prayer_walls.id"), nullable=False, index=True)
     created_by = Column(String(36), ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=func.now())
     expires_at = Column(DateTime, nullable=True)
@@ -178,3 +220,37 @@ class DeviceToken(Base):
     
     # Relationship with User
     user = relationship("User", back_populates="device_tokens")
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "device_token", name="uq_device_tokens_user_token"),
+        # Fan-out only ever loads active devices
+        Index("ix_device_tokens_user_active", "user_id", postgresql_where=text("is_active")),
+    )
+
+
+# Notifications waiting to be pushed. Rows are written in the same transaction as
+# the change that triggers them and delivered by the background dispatcher.
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    title = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    # Set for events that may be merged into a digest with the user's other pending events
+    event_type = Column(String, nullable=True)  # e.g. "wall_join", "wall_share"
+    group_key = Column(String, nullable=True)  # What the event is about, e.g. "wall:<id>"
+    group_label = Column(String, nullable=True)  # How the digest names it, e.g. the wall title
+    status = Column(String, nullable=False, default="pending")  # "pending", "sent" or "failed"
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=func.now())
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The dispatcher only ever looks for pending rows that are due
+        Index("ix_notification_outbox_due", "next_attempt_at", postgresql_where=text("status = 'pending'")),
+        # Coalescing picks up the rest of a user's pending events when one of them comes due
+        Index("ix_notification_outbox_pending_user", "user_id", postgresql_where=text("status = 'pending'")),
+    )
@@ -5,3 +5,21 @@ from typing import Optional
 class DeviceTokenCreate(BaseModel):
     device_token: str
 
+
+class ReminderRuleCreate(BaseModel):
+    rrule: str  # e.g. "FREQ=DAILY;BYHOUR=7;BYMINUTE=0"
+    timezone: str = "UTC"
+    prayer_id: Optional[str] = None
+    starts_at: Optional[datetime] = None  # Local time in `timezone`, defaults to now
+
+class ReminderRuleResponse(BaseModel):
+    id: str
+    rrule: str
+    timezone: str
+    prayer_id: Optional[str]
+    starts_at: datetime
+    is_active: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
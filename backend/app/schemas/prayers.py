@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from app.models.models import PrayerType
 from app.schemas.prayer_walls import PrayerWallResponse
@@ -69,6 +69,10 @@ class PrayerResponse(BaseModel):
         d['created_at'] = self.created_at.strftime("%Y-%m-%d %H:%M:%S")
         return d
 
+class PrayersPage(BaseModel):
+    prayers: List[PrayerResponse]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page, None on the last one
+
 class PrayerWallsResponse(BaseModel):
     prayer_walls: List[PrayerWallResponse]
 
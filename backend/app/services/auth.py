@@ -1,7 +1,12 @@
+import asyncio
 import httpx
 import jwt
 import logging
-from fastapi import Depends, HTTPException, Request
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+from fastapi import Depends, HTTPException, Request, WebSocket, WebSocketException, status
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, timezone
@@ -10,7 +15,8 @@ from sqlalchemy import select
 from app.config import config
 from app.schemas.auth import AppleToken, AccessToken
 from app.models import User
-from app.db.database import get_db
+from app.db.database import AsyncSessionLocal, get_db
+from app.services.cache import TTLCache
 
 logging.basicConfig(format="%(levelname)s - %(name)s -  %(message)s", level=logging.WARNING)
 logging.getLogger("prayer-api").setLevel(logging.INFO)
@@ -22,15 +28,8 @@ APPLE_PUBLIC_KEYS_URL = "https://appleid.apple.com/auth/keys"
 APPLE_AUDIENCE = "dhongz.Prayer" 
 
 
-async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)):
-    # Expect the token to always come via the Authorization header
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
-    
-    # Extract the token from the header
-    token = auth_header[len("Bearer "):].strip()
-    
+def decode_access_token(token: str) -> str:
+    """Validate one of our access tokens and return the user id it was issued for"""
     try:
         # Decode the token using the secret key and specify the algorithm
         payload = jwt.decode(token, config.JWT_SECRET, algorithms=["HS256"])
@@ -41,17 +40,88 @@ async def get_current_user(request: Request, db: AsyncSession = Depends(get_db))
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
-    
-    # Retrieve the user based on the email contained in the token's payload
-    stmt = select(User).where(User.id == user_id)
-    result = await db.execute(stmt)
-    user = result.scalar_one_or_none()
-    
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    
+    return user_id
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """The parts of a User that request handlers need, safe to share between requests"""
+    id: str
+    email: str
+    name: Optional[str]
+    is_active: bool
+
+
+# Deactivating a user takes effect in each worker once its cached principal expires
+user_principal_cache = TTLCache("user_principals", config.USER_CACHE_MAX_ENTRIES, config.USER_CACHE_TTL_SECONDS)
+
+
+async def get_user_by_id(user_id: str, db: AsyncSession) -> UserPrincipal:
+    async def load_user():
+        # Retrieve the user based on the id contained in the token's payload
+        stmt = select(User.id, User.email, User.name, User.is_active).where(User.id == user_id)
+        result = await db.execute(stmt)
+        user = result.one_or_none()
+
+        if user is None:
+            raise HTTPException(status_code=401, detail="User not found")
+
+        return UserPrincipal(id=user.id, email=user.email, name=user.name, is_active=user.is_active is not False)
+
+    user = await user_principal_cache.get_or_create(user_id, load_user)
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail="User is deactivated")
     return user
 
+
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)):
+    # Expect the token to always come via the Authorization header
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
+    
+    # Extract the token from the header
+    token = auth_header[len("Bearer "):].strip()
+    user_id = decode_access_token(token)
+    return await get_user_by_id(user_id, db)
+
+
+async def load_user(user_id: str) -> UserPrincipal:
+    """get_user_by_id in a session of its own, closed again before the principal is returned"""
+    async with AsyncSessionLocal() as db:
+        return await get_user_by_id(user_id, db)
+
+
+async def get_current_principal(request: Request) -> UserPrincipal:
+    """
+    Like get_current_user, deactivated users included, but without a request-scoped
+    session: routes that wait on slow upstream calls (LLM, transcription) and never
+    touch the database don't hold a pooled connection for their whole duration
+    """
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
+    return await load_user(decode_access_token(auth_header[len("Bearer "):].strip()))
+
+
+async def get_current_user_ws(websocket: WebSocket):
+    """
+    WebSocket variant of get_current_principal, so no session stays open for the
+    lifetime of the socket. Clients that cannot set headers on the handshake may pass
+    the access token as a `token` query parameter instead.
+    """
+    auth_header = websocket.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        token = auth_header[len("Bearer "):].strip()
+    else:
+        token = websocket.query_params.get("token")
+    try:
+        if not token:
+            raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
+        return await load_user(decode_access_token(token))
+    except HTTPException as e:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+
 def generate_access_token(user_id: str)-> AccessToken:
     try:
         print(f"Generating access token for user_id: {user_id}")
@@ -86,29 +156,107 @@ async def create_user(provider_id: str, email: str, db: AsyncSession):
 
 
 
-async def get_apple_public_keys():
-    async with httpx.AsyncClient() as client:
-        response = await client.get(APPLE_PUBLIC_KEYS_URL)
+class AppleJWKSCache:
+    """
+    Apple's sign-in public keys, parsed once and kept by kid.
+
+    Keys are cached for the max-age Apple sends in Cache-Control (or default_ttl)
+    and refreshed in the background once less than refresh_margin of that time is
+    left, so sign-in does not wait on appleid.apple.com. A token signed with an
+    unknown kid forces one refresh, shared by every request that needs it and at
+    most once per min_refresh_interval. If Apple is unreachable, the last known
+    keys keep being used.
+    """
+
+    def __init__(self, url: str, default_ttl: float = 3600, refresh_margin: float = 0.2,
+                 min_refresh_interval: float = 30):
+        self.url = url
+        self.default_ttl = default_ttl
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self._keys = {}
+        self._ttl = default_ttl
+        self._expires_at = 0.0
+        self._last_refresh = float("-inf")
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._background_task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _max_age(self, cache_control: str) -> float:
+        if re.search(r"no-cache|no-store", cache_control):
+            return 0
+        match = re.search(r"max-age=(\d+)", cache_control)
+        return float(match.group(1)) if match else self.default_ttl
+
+    async def _fetch(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10.0)
+        self._last_refresh = time.monotonic()
+        response = await self._client.get(self.url)
         if response.status_code != 200:
             raise HTTPException(status_code=500, detail="Could not fetch Apple public keys")
-        return response.json()["keys"]
+        keys = {
+            key["kid"]: jwt.algorithms.RSAAlgorithm.from_jwk(key)
+            for key in response.json()["keys"]
+        }
+        self._keys = keys
+        self._ttl = self._max_age(response.headers.get("Cache-Control", ""))
+        self._expires_at = time.monotonic() + self._ttl
+        logger.info(f"Refreshed Apple public keys: {sorted(keys)}")
+
+    async def refresh(self):
+        """Fetch the key set, joining a refresh that is already in progress"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._fetch())
+        await asyncio.shield(self._refresh_task)
+
+    def _refresh_in_background(self):
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+
+        async def refresh():
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Background refresh of Apple public keys failed: {e}")
+
+        self._background_task = asyncio.create_task(refresh())
+
+    async def get_key(self, kid: str):
+        """Public key for kid, or None when Apple does not publish it"""
+        now = time.monotonic()
+        if not self._keys or now >= self._expires_at:
+            try:
+                await self.refresh()
+            except Exception as e:
+                if not self._keys:
+                    raise
+                logger.warning(f"Using stale Apple public keys, refresh failed: {e}")
+        elif self._expires_at - now < self._ttl * self.refresh_margin:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._last_refresh >= self.min_refresh_interval:
+            # Apple may have rotated its keys since the last fetch
+            await self.refresh()
+            key = self._keys.get(kid)
+        return key
+
+
+apple_jwks = AppleJWKSCache(APPLE_PUBLIC_KEYS_URL)
 
 async def verify_apple_token(identity_token: str):
     try:
-        apple_keys = await get_apple_public_keys()
-
         # Extract the JWT header to determine which Apple key was used
         headers = jwt.get_unverified_header(identity_token)
 
         key_id = headers["kid"]
 
         # Find the correct Apple public key
-        key = next((key for key in apple_keys if key["kid"] == key_id), None)
-        if not key:
+        public_key = await apple_jwks.get_key(key_id)
+        if public_key is None:
             raise HTTPException(status_code=400, detail="Invalid Apple public key")
 
-        # Construct the public key
-        public_key = jwt.algorithms.RSAAlgorithm.from_jwk(key)
         try:
             # ✅ Decode and verify the JWT
             decoded_token = jwt.decode(
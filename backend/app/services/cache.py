@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# Every cache registers itself here so /metrics/caches can report on it
+CACHES: Dict[str, "TTLCache"] = {}
+
+_MISSING = object()
+# Result of an in-flight call whose caller was cancelled before the factory finished
+_ABANDONED = object()
+
+
+class TTLCache:
+    """
+    In-process LRU cache with a per-entry time to live and a bound on the number
+    of entries. get_or_create also collapses concurrent misses for the same key
+    into a single call of the factory; if the caller running it is cancelled, a
+    waiting caller takes over. on_evict, if given, is called with the key and value of
+    every entry dropped for expiring or being least recently used (not for invalidate
+    or pop). Not shared between worker processes.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float,
+                 on_evict: Optional[Callable[[Hashable, Any], None]] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        CACHES[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._evict(key)
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        now = time.monotonic()
+        # Drop the least recently used entries while there are too many or they have expired
+        while self._entries:
+            oldest, (_, expires_at) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and expires_at > now:
+                break
+            self._evict(oldest)
+
+    def _evict(self, key: Hashable):
+        value, _ = self._entries.pop(key)
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value, default if it is missing or has expired"""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                self._evict(key)
+            return default
+        del self._entries[key]
+        return entry[0]
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_create(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            # Another request is already computing this key, wait for its result
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            value = await asyncio.shield(inflight)
+            # That request was cancelled, so one of its waiters runs its own factory instead
+            if value is not _ABANDONED:
+                return value
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await factory()
+        except asyncio.CancelledError:
+            # Cancelling the future would cancel every waiter along with this caller
+            future.set_result(_ABANDONED)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,200 @@
+import json
+import os
+import hashlib
+import logging
+import shutil
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.config import config
+
+logging.basicConfig(format="%(levelname)s - %(name)s -  %(message)s", level=logging.WARNING)
+logging.getLogger("prayer-api").setLevel(logging.INFO)
+logger = logging.getLogger("prayer-api")
+
+ARTIFACT_FORMAT_VERSION = 1
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.jsonl"
+MANIFEST_FILE = "manifest.json"
+LATEST_FILE = "LATEST"
+
+
+@dataclass
+class EmbeddingArtifact:
+    """A versioned export of the Bible chunk embeddings."""
+    path: str
+    manifest: dict
+    embeddings: np.ndarray  # float32, shape (count, dimension), read-only memmap when loaded
+    metadata: List[dict]    # one entry per embeddings row
+
+    @property
+    def model(self) -> str:
+        return self.manifest["model"]
+
+    @property
+    def dimension(self) -> int:
+        return self.manifest["dimension"]
+
+    def as_embeddings(self, fallback: Optional[Embeddings] = None) -> "ArtifactEmbeddings":
+        return ArtifactEmbeddings(self, fallback)
+
+
+class ArtifactEmbeddings(Embeddings):
+    """
+    Embeddings backed by an exported artifact, so a re-ingest into the vector
+    store reuses the stored vectors instead of calling the embedding API again.
+    Texts missing from the artifact go to the fallback model when one is given.
+    """
+
+    def __init__(self, artifact: EmbeddingArtifact, fallback: Optional[Embeddings] = None):
+        self.artifact = artifact
+        self.fallback = fallback
+        self._rows = {meta["text"]: i for i, meta in enumerate(artifact.metadata)}
+
+    def _lookup(self, text: str) -> List[float]:
+        row = self._rows.get(text)
+        if row is not None:
+            return self.artifact.embeddings[row].tolist()
+        if self.fallback is None:
+            raise KeyError("Text not found in embedding artifact and no fallback model configured")
+        return self.fallback.embed_query(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._lookup(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._lookup(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        missing = [text for text in texts if text not in self._rows]
+        if missing and self.fallback is not None:
+            vectors = dict(zip(missing, await self.fallback.aembed_documents(missing)))
+            return [vectors[text] if text in vectors else self._lookup(text) for text in texts]
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+def chunk_id(metadata: dict) -> str:
+    """Stable id for a Bible chunk, e.g. 'GEN.1.1-5'"""
+    return (f"{metadata['book_id']}.{metadata['chapter_number']}."
+            f"{metadata['verse_number_start']}-{metadata['verse_number_end']}")
+
+
+def write_embedding_artifact(
+    docs: List[Document],
+    vectors: List[List[float]],
+    model: str,
+    output_dir: str
+) -> str:
+    """
+    Write docs and their embeddings to a new versioned directory under output_dir
+    and point the LATEST file at it. Returns the path of the new version.
+    """
+    if len(docs) != len(vectors):
+        raise ValueError(f"Got {len(docs)} documents but {len(vectors)} embeddings")
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim != 2:
+        raise ValueError(f"Embeddings must be a 2-D matrix, got shape {matrix.shape}")
+
+    metadata = []
+    for doc in docs:
+        metadata.append({
+            "chunk_id": chunk_id(doc.metadata),
+            "book_id": doc.metadata["book_id"],
+            "book_name": doc.metadata["book_name"],
+            "chapter_number": int(doc.metadata["chapter_number"]),
+            "verse_number_start": int(doc.metadata["verse_number_start"]),
+            "verse_number_end": int(doc.metadata["verse_number_end"]),
+            "translation_id": doc.metadata.get("translation_id"),
+            "text": doc.page_content,
+        })
+
+    digest = hashlib.sha256()
+    digest.update(model.encode())
+    for meta in metadata:
+        digest.update(meta["chunk_id"].encode())
+    created_at = datetime.now(timezone.utc)
+    version = f"{created_at.strftime('%Y%m%d%H%M%S')}-{digest.hexdigest()[:8]}"
+
+    manifest = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "version": version,
+        "model": model,
+        "dimension": int(matrix.shape[1]),
+        "count": int(matrix.shape[0]),
+        "dtype": "float32",
+        "created_at": created_at.isoformat(),
+        "files": {
+            "embeddings": EMBEDDINGS_FILE,
+            "metadata": METADATA_FILE,
+        },
+    }
+
+    # Write into a temporary directory first so readers never see a partial export
+    final_path = os.path.join(output_dir, version)
+    tmp_path = final_path + ".tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    try:
+        np.save(os.path.join(tmp_path, EMBEDDINGS_FILE), matrix)
+        with open(os.path.join(tmp_path, METADATA_FILE), "w") as f:
+            for meta in metadata:
+                f.write(json.dumps(meta) + "\n")
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, final_path)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    latest_tmp = os.path.join(output_dir, LATEST_FILE + ".tmp")
+    with open(latest_tmp, "w") as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(output_dir, LATEST_FILE))
+
+    logger.info(f"Wrote embedding artifact {version} with {manifest['count']} chunks to {final_path}")
+    return final_path
+
+
+def resolve_artifact_path(root: str, version: Optional[str] = None) -> str:
+    if version is None:
+        with open(os.path.join(root, LATEST_FILE)) as f:
+            version = f.read().strip()
+    return os.path.join(root, version)
+
+
+@lru_cache(maxsize=4)
+def load_embedding_artifact(path: Optional[str] = None) -> EmbeddingArtifact:
+    """
+    Load an embedding artifact with the matrix memory-mapped read-only, so every
+    worker process shares the same page-cached copy. Defaults to the latest
+    version under EMBEDDING_ARTIFACT_DIR. Cached per process.
+    """
+    if path is None:
+        if not config.EMBEDDING_ARTIFACT_DIR:
+            raise ValueError("EMBEDDING_ARTIFACT_DIR is not configured")
+        path = resolve_artifact_path(config.EMBEDDING_ARTIFACT_DIR)
+
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported embedding artifact format: {manifest.get('format_version')}")
+
+    embeddings = np.load(os.path.join(path, manifest["files"]["embeddings"]), mmap_mode="r")
+    with open(os.path.join(path, manifest["files"]["metadata"])) as f:
+        metadata = [json.loads(line) for line in f if line.strip()]
+
+    if embeddings.dtype != np.float32 or embeddings.shape != (manifest["count"], manifest["dimension"]):
+        raise ValueError(f"Embedding matrix {embeddings.dtype}{embeddings.shape} does not match manifest")
+    if len(metadata) != manifest["count"]:
+        raise ValueError(f"Metadata has {len(metadata)} rows, manifest expects {manifest['count']}")
+
+    return EmbeddingArtifact(path=path, manifest=manifest, embeddings=embeddings, metadata=metadata)
@@ -0,0 +1,118 @@
+import json
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+from urllib.parse import urlencode
+
+from websockets.asyncio.client import connect, ClientConnection
+from websockets.exceptions import ConnectionClosed
+
+from app.config import config
+
+logging.basicConfig(format="%(levelname)s - %(name)s -  %(message)s", level=logging.WARNING)
+logging.getLogger("prayer-api").setLevel(logging.INFO)
+logger = logging.getLogger("prayer-api")
+
+
+@dataclass
+class TranscriptSegment:
+    text: str
+    is_final: bool
+
+
+class LiveTranscriptionSession(ABC):
+    """
+    One live transcription stream. Audio goes in with send(), finish() signals
+    the end of the audio, and iterating the session yields interim and final
+    segments until the backend has flushed everything and closed.
+    """
+
+    @abstractmethod
+    async def send(self, audio: bytes):
+        ...
+
+    @abstractmethod
+    async def finish(self):
+        ...
+
+    @abstractmethod
+    def __aiter__(self) -> AsyncIterator[TranscriptSegment]:
+        ...
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class LiveTranscriber(ABC):
+    """Opens live transcription sessions. Swap implementations with the get_live_transcriber dependency."""
+
+    @abstractmethod
+    async def open(self, encoding: Optional[str] = None, sample_rate: Optional[int] = None) -> LiveTranscriptionSession:
+        ...
+
+
+class DeepgramLiveSession(LiveTranscriptionSession):
+    def __init__(self, websocket: ClientConnection):
+        self.websocket = websocket
+
+    async def send(self, audio: bytes):
+        await self.websocket.send(audio)
+
+    async def finish(self):
+        # Deepgram flushes any buffered audio, sends the last results and closes the socket
+        await self.websocket.send(json.dumps({"type": "CloseStream"}))
+
+    async def __aiter__(self) -> AsyncIterator[TranscriptSegment]:
+        try:
+            async for message in self.websocket:
+                if isinstance(message, bytes):
+                    continue
+                result = json.loads(message)
+                if result.get("type") != "Results":
+                    continue
+                transcript = result["channel"]["alternatives"][0]["transcript"]
+                if transcript:
+                    yield TranscriptSegment(text=transcript, is_final=bool(result.get("is_final")))
+        except ConnectionClosed as e:
+            logger.warning(f"Deepgram live connection closed unexpectedly: {e}")
+
+    async def close(self):
+        await self.websocket.close()
+
+
+class DeepgramLiveTranscriber(LiveTranscriber):
+    """Relays audio to Deepgram's streaming /v1/listen endpoint"""
+
+    def __init__(self, base_url: str = None, api_key: str = None, model: str = "nova-3"):
+        base_url = base_url or config.DEEPGRAM_URL
+        self.url = base_url.replace("https://", "wss://", 1).replace("http://", "ws://", 1) + "/v1/listen"
+        self.api_key = api_key or config.DEEPGRAM_API_KEY
+        self.model = model
+
+    async def open(self, encoding: Optional[str] = None, sample_rate: Optional[int] = None) -> DeepgramLiveSession:
+        params = {"model": self.model, "smart_format": "true", "interim_results": "true"}
+        # Containerized audio (m4a, wav, webm...) is detected automatically; raw PCM needs both
+        if encoding:
+            params["encoding"] = encoding
+        if sample_rate:
+            params["sample_rate"] = sample_rate
+        websocket = await connect(
+            f"{self.url}?{urlencode(params)}",
+            additional_headers={"Authorization": f"Token {self.api_key}"},
+            open_timeout=10,
+        )
+        return DeepgramLiveSession(websocket)
+
+
+_live_transcriber = DeepgramLiveTranscriber()
+
+def get_live_transcriber() -> LiveTranscriber:
+    """FastAPI dependency, override with app.dependency_overrides to use a stand-in"""
+    return _live_transcriber
@@ -0,0 +1,319 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import String, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import config
+from app.config.apple_push import PushStatus
+from app.db.database import AsyncSessionLocal
+from app.models import NotificationOutbox, PrayerWall, prayer_wall_users
+from app.services.notifications import load_active_device_tokens, push_to_devices, record_deliveries
+
+logging.basicConfig(format="%(levelname)s - %(name)s -  %(message)s", level=logging.WARNING)
+logging.getLogger("prayer-api").setLevel(logging.INFO)
+logger = logging.getLogger("prayer-api")
+
+# How digests describe a number of events of each type, singular and plural
+EVENT_PHRASES = {
+    "wall_join": ("new member", "new members"),
+    "wall_share": ("new prayer", "new prayers"),
+}
+
+
+def enqueue_notification(
+    db: AsyncSession,
+    user_id: str,
+    title: str,
+    body: str,
+    event_type: str = None,
+    group_key: str = None,
+    group_label: str = None
+) -> NotificationOutbox:
+    """
+    Queue a push for user_id in the caller's transaction. Nothing is sent until the
+    caller commits, and the dispatcher picks the row up after that. Events with an
+    event_type wait out the coalescing window so a burst becomes one digest.
+    """
+    entry = NotificationOutbox(
+        user_id=user_id,
+        title=title,
+        body=body,
+        event_type=event_type,
+        group_key=group_key,
+        group_label=group_label,
+        next_attempt_at=coalesce_until(event_type)
+    )
+    db.add(entry)
+    return entry
+
+
+async def enqueue_wall_event(
+    db: AsyncSession,
+    wall_ids: List[str],
+    event_type: str,
+    body,
+    exclude_user_id: str = None
+):
+    """
+    Queue an event for every member of the given walls in one INSERT ... SELECT, titled
+    with the wall's name. body is a string or a SQL expression evaluated in the same
+    statement. Like enqueue_notification it joins the caller's transaction.
+    """
+    columns = ["id", "user_id", "title", "body", "event_type", "group_key", "group_label",
+               "status", "attempts", "next_attempt_at", "created_at"]
+    members = (
+        select(
+            func.gen_random_uuid().cast(String),
+            prayer_wall_users.c.user_id,
+            PrayerWall.title,
+            literal(body) if isinstance(body, str) else body,
+            literal(event_type),
+            literal("wall:") + PrayerWall.id,
+            PrayerWall.title,
+            literal("pending"),
+            literal(0),
+            literal(coalesce_until(event_type)),
+            func.now()
+        )
+        .join(PrayerWall, PrayerWall.id == prayer_wall_users.c.prayer_wall_id)
+        .where(prayer_wall_users.c.prayer_wall_id.in_(wall_ids))
+    )
+    if exclude_user_id:
+        members = members.where(prayer_wall_users.c.user_id != exclude_user_id)
+    await db.execute(insert(NotificationOutbox).from_select(columns, members))
+
+
+def coalesce_until(event_type: str = None) -> datetime:
+    """When a newly queued notification becomes due"""
+    if event_type and config.NOTIFICATION_COALESCE_SECONDS > 0:
+        return datetime.now() + timedelta(seconds=config.NOTIFICATION_COALESCE_SECONDS)
+    return datetime.now()
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter, capped at OUTBOX_MAX_BACKOFF_SECONDS"""
+    ceiling = min(config.OUTBOX_MAX_BACKOFF_SECONDS, config.OUTBOX_BASE_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def _count_phrase(event_type: str, count: int) -> str:
+    singular, plural = EVENT_PHRASES.get(event_type, ("update", "updates"))
+    return f"{count} {singular if count == 1 else plural}"
+
+
+def digest_message(entries: List[NotificationOutbox]) -> Dict[str, str]:
+    """
+    Merge several events for one user into one notification, e.g. "3 new prayers and
+    1 new member on Family Wall". A single event keeps its own title and body.
+    """
+    if len(entries) == 1:
+        return {"title": entries[0].title, "body": entries[0].body}
+
+    groups: Dict[str, Dict[str, int]] = {}
+    labels: Dict[str, str] = {}
+    for entry in entries:
+        key = entry.group_key or ""
+        counts = groups.setdefault(key, {})
+        counts[entry.event_type] = counts.get(entry.event_type, 0) + 1
+        labels[key] = entry.group_label or labels.get(key) or "your prayer walls"
+
+    parts = []
+    for key, counts in groups.items():
+        phrases = [_count_phrase(event_type, count) for event_type, count in counts.items()]
+        parts.append(f"{' and '.join(phrases)} on {labels[key]}")
+    title = labels[next(iter(groups))] if len(groups) == 1 else "Prayer wall activity"
+    return {"title": title, "body": ", ".join(parts)}
+
+
+@dataclass
+class _Delivery:
+    """One push to a user, covering one outbox row or a digest of several"""
+    user_id: str
+    title: str
+    body: str
+    entries: List[NotificationOutbox] = field(default_factory=list)
+
+
+class NotificationDispatcher:
+    """
+    Delivers queued notifications in the background. Each round claims a batch of due
+    rows with FOR UPDATE SKIP LOCKED, so several workers can run dispatchers against the
+    same table without sending anything twice, and pushes a lease onto next_attempt_at
+    before releasing the locks. If a worker dies mid-send the lease runs out and another
+    dispatcher retries the rows.
+
+    When a coalescable event comes due, the user's other pending coalescable events that
+    haven't been attempted yet are claimed with it, even if their own window is still
+    open, and all of them go out as a single digest push.
+    """
+
+    def __init__(self, batch_size: int = None, poll_seconds: float = None,
+                 lease_seconds: float = None, max_attempts: int = None):
+        self.batch_size = batch_size or config.OUTBOX_BATCH_SIZE
+        self.poll_seconds = poll_seconds or config.OUTBOX_POLL_SECONDS
+        self.lease_seconds = lease_seconds or config.OUTBOX_LEASE_SECONDS
+        self.max_attempts = max_attempts or config.OUTBOX_MAX_ATTEMPTS
+        self._task: asyncio.Task = None
+        self._wakeup = asyncio.Event()
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.coalesced = 0
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        """Skip the rest of the poll interval, e.g. right after a request has queued something"""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                claimed = await self.dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification dispatcher round failed: {e}")
+                claimed = 0
+            # A full batch means there is probably more waiting
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def _claim(self, db: AsyncSession) -> List[NotificationOutbox]:
+        now = datetime.now()
+        result = await db.execute(
+            select(NotificationOutbox)
+            .where(
+                (NotificationOutbox.status == "pending") &
+                (NotificationOutbox.next_attempt_at <= now)
+            )
+            .order_by(NotificationOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        entries = list(result.scalars().all())
+
+        # Pull forward the rest of the pending events of users who have one coming due. Only
+        # rows that were never claimed: attempted rows are either leased to another dispatcher
+        # mid-send (their locks went at its claim's commit) or waiting out a retry backoff.
+        coalescing_users = {entry.user_id for entry in entries if entry.event_type}
+        if coalescing_users:
+            result = await db.execute(
+                select(NotificationOutbox)
+                .where(
+                    (NotificationOutbox.status == "pending") &
+                    (NotificationOutbox.attempts == 0) &
+                    NotificationOutbox.user_id.in_(coalescing_users) &
+                    NotificationOutbox.event_type.isnot(None) &
+                    NotificationOutbox.id.notin_([entry.id for entry in entries])
+                )
+                .with_for_update(skip_locked=True)
+            )
+            entries.extend(result.scalars().all())
+
+        if entries:
+            await db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_([entry.id for entry in entries]))
+                .values(
+                    next_attempt_at=now + timedelta(seconds=self.lease_seconds),
+                    attempts=NotificationOutbox.attempts + 1
+                )
+            )
+        await db.commit()
+        return entries
+
+    def _deliveries(self, entries: List[NotificationOutbox]) -> List[_Delivery]:
+        deliveries = []
+        digests: Dict[str, List[NotificationOutbox]] = {}
+        for entry in entries:
+            if entry.event_type:
+                digests.setdefault(entry.user_id, []).append(entry)
+            else:
+                deliveries.append(_Delivery(entry.user_id, entry.title, entry.body, [entry]))
+        for user_id, events in digests.items():
+            events.sort(key=lambda entry: entry.created_at or datetime.min)
+            deliveries.append(_Delivery(user_id, entries=events, **digest_message(events)))
+            self.coalesced += len(events) - 1
+        return deliveries
+
+    async def dispatch_once(self) -> int:
+        """Claim and deliver one batch, returns the number of rows claimed"""
+        async with AsyncSessionLocal() as db:
+            entries = await self._claim(db)
+            if not entries:
+                return 0
+
+            deliveries = self._deliveries(entries)
+            device_tokens = await load_active_device_tokens({delivery.user_id for delivery in deliveries}, db)
+            tokens_by_user = {}
+            for token in device_tokens:
+                tokens_by_user.setdefault(token.user_id, []).append(token)
+
+            semaphore = asyncio.Semaphore(config.PUSH_FANOUT_CONCURRENCY)
+            outcomes = await asyncio.gather(*(
+                push_to_devices(tokens_by_user.get(delivery.user_id, []), delivery.title, delivery.body, semaphore)
+                for delivery in deliveries
+            ))
+            await record_deliveries([result for results in outcomes for result in results], db)
+
+            now = datetime.now()
+            for delivery, results in zip(deliveries, outcomes):
+                # The claim's UPDATE has already counted this attempt on the loaded rows
+                attempts = max(entry.attempts for entry in delivery.entries)
+                # A user without devices has nothing to retry, and one working device is enough
+                if not results or any(result.success for result in results):
+                    values = {"status": "sent", "sent_at": now, "last_error": None}
+                    self.sent += 1
+                elif attempts >= self.max_attempts or not any(
+                    result.status == PushStatus.RETRYABLE for result in results
+                ):
+                    values = {"status": "failed", "last_error": results[0].error}
+                    self.failed += 1
+                    logger.error(f"Giving up on notification for user {delivery.user_id} after {attempts} attempts: {results[0].error}")
+                else:
+                    values = {
+                        "next_attempt_at": now + timedelta(seconds=retry_delay(attempts)),
+                        "last_error": results[0].error
+                    }
+                    self.retried += 1
+                await db.execute(
+                    update(NotificationOutbox)
+                    .where(NotificationOutbox.id.in_([entry.id for entry in delivery.entries]))
+                    .values(**values)
+                )
+            await db.commit()
+            return len(entries)
+
+    def metrics(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+        }
+
+
+notification_dispatcher = NotificationDispatcher()
@@ -1,14 +1,21 @@
+import asyncio
 import jwt
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import DeviceToken, User
+from app.config import config
+from app.models import DeviceToken, User, PrayerWall, prayer_wall_users
 from app.schemas.api import Message
 from app.config.apple_push import (
-    create_push_notification_auth_token,
+    APNsError,
+    PushStatus,
+    get_push_notification_auth_token,
     send_push_notification
 )
 
@@ -23,29 +30,18 @@ async def register_device_token(
     current_user: User
 ):
     try:
-        # Check if token already exists
-        stmt = select(DeviceToken).where(
-            (DeviceToken.device_token == device_token) &
-            (DeviceToken.user_id == current_user.id)
-        )
-        result = await db.execute(stmt)
-        existing_token = result.scalar_one_or_none()
-        
-        if existing_token:
-            existing_token.is_active = True
-            existing_token.last_used = datetime.now()
-            await db.commit()
-            return Message(message="Device token updated successfully")
-            
-        # Create new token
-        new_token = DeviceToken(
-            user_id=current_user.id,
-            device_token=device_token
+        # (user_id, device_token) is unique, so re-registering just reactivates the existing row
+        await db.execute(
+            pg_insert(DeviceToken)
+            .values(user_id=current_user.id, device_token=device_token)
+            .on_conflict_do_update(
+                index_elements=[DeviceToken.user_id, DeviceToken.device_token],
+                set_={"is_active": True, "last_used": datetime.now()}
+            )
         )
-        db.add(new_token)
         await db.commit()
         
-        return {"message": "Device token registered successfully"}
+        return Message(message="Device token registered successfully")
         
     except Exception as e:
         await db.rollback()
@@ -70,57 +66,46 @@ async def send_notification(
         if not device_tokens:
             return
             
-        # Create Apple auth token
-        auth_token = create_push_notification_auth_token()
-        
-        # Send to all user's devices
-        for token in device_tokens:
-            try:
-                await send_push_notification(
-                    device_token=token.device_token,
-                    title=title,
-                    body=body,
-                    auth_token=auth_token
-                )
-            except Exception as e:
-                logger.error(f"Error sending notification to token {token.id}: {e}")
-                # If token is invalid, mark as inactive
-                if "BadDeviceToken" in str(e):
-                    token.is_active = False
-                    await db.commit()
+        results = await push_to_devices(device_tokens, title, body)
+        await record_deliveries(results, db)
                     
     except Exception as e:
         logger.error(f"Error sending notification: {e}")
         raise HTTPException(status_code=500, detail="Error sending notification")
 
-async def send_notification_to_user(
-    user_id: str,
-    title: str,
-    body: str,
-    db: AsyncSession
-):
-    try:
-        # Get all active device tokens for the user
-        stmt = select(DeviceToken).where(
-            (DeviceToken.user_id == user_id) &
+@dataclass
+class PushResult:
+    """Outcome of one push to one device"""
+    user_id: str
+    device_token_id: str
+    status: PushStatus
+    reason: Optional[str] = None  # APNs reason, e.g. "Unregistered"
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.status == PushStatus.DELIVERED
+
+
+async def load_active_device_tokens(user_ids: Iterable[str], db: AsyncSession) -> list:
+    """(id, user_id, device_token) rows for every active device of the given users, in one query"""
+    result = await db.execute(
+        select(DeviceToken.id, DeviceToken.user_id, DeviceToken.device_token).where(
+            DeviceToken.user_id.in_(list(user_ids)) &
             (DeviceToken.is_active == True)
         )
-        result = await db.execute(stmt)
-        device_tokens = result.scalars().all()
-        
-        if not device_tokens:
-            logger.info(f"No active device tokens found for user {user_id}")
-            return  # No active devices to send to
-            
-        # Create Apple auth token once for all devices
-        try:
-            auth_token = create_push_notification_auth_token()
-        except Exception as e:
-            logger.error(f"Failed to create auth token: {e}")
-            raise HTTPException(status_code=500, detail="Failed to create notification auth token")
-        
-        # Send to all user's devices
-        for token in device_tokens:
+    )
+    return result.all()
+
+
+async def push_to_devices(device_tokens: list, title: str, body: str,
+                          semaphore: asyncio.Semaphore = None) -> List[PushResult]:
+    """Push one notification to each device concurrently, with at most the semaphore's limit in flight"""
+    auth_token = get_push_notification_auth_token()
+    semaphore = semaphore or asyncio.Semaphore(config.PUSH_FANOUT_CONCURRENCY)
+
+    async def push(token) -> PushResult:
+        async with semaphore:
             try:
                 await send_push_notification(
                     device_token=token.device_token,
@@ -128,19 +113,106 @@ async def send_notification_to_user(
                     body=body,
                     auth_token=auth_token
                 )
-                # Update last_used timestamp
-                token.last_used = datetime.now()
+                return PushResult(user_id=token.user_id, device_token_id=token.id, status=PushStatus.DELIVERED)
+            except APNsError as e:
+                logger.error(f"Error sending notification to token {token.id}: {e}")
+                return PushResult(user_id=token.user_id, device_token_id=token.id, status=e.outcome.status,
+                                  reason=e.outcome.reason, error=str(e))
             except Exception as e:
                 logger.error(f"Error sending notification to token {token.id}: {e}")
-                # If token is invalid, mark as inactive
-                # if "BadDeviceToken" in str(e) or "invalid" in str(e).lower() or "illegal" in str(e).lower():
-                #     logger.info(f"Marking device token {token.id} as inactive due to error: {e}")
-                #     token.is_active = False
-        
+                return PushResult(user_id=token.user_id, device_token_id=token.id, status=PushStatus.RETRYABLE,
+                                  error=str(e))
+
+    return list(await asyncio.gather(*(push(token) for token in device_tokens)))
+
+
+async def record_deliveries(results: List[PushResult], db: AsyncSession):
+    """
+    Bump last_used on every device that was delivered to and deactivate the ones APNs
+    says are dead (Unregistered, BadDeviceToken...), one UPDATE each per fan-out
+    """
+    delivered = [result.device_token_id for result in results if result.success]
+    dead = [result.device_token_id for result in results if result.status == PushStatus.INVALID_TOKEN]
+    if delivered:
+        await db.execute(
+            update(DeviceToken)
+            .where(DeviceToken.id.in_(delivered))
+            .values(last_used=datetime.now())
+        )
+    if dead:
+        await db.execute(
+            update(DeviceToken)
+            .where(DeviceToken.id.in_(dead))
+            .values(is_active=False)
+        )
+        logger.info(f"Deactivated {len(dead)} device tokens rejected by APNs")
+    if delivered or dead:
         await db.commit()
-        
+
+
+async def send_notification_to_users(
+    user_ids: Iterable[str],
+    title: str,
+    body: str,
+    db: AsyncSession,
+    concurrency: int = None
+) -> List[PushResult]:
+    """
+    Push to every active device of every user in user_ids. Device tokens are loaded
+    in one query and pushed concurrently (at most `concurrency` in flight), so a
+    large group takes about as long as a single APNs round-trip.
+    """
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return []
+
+    device_tokens = await load_active_device_tokens(user_ids, db)
+    if not device_tokens:
+        logger.info(f"No active device tokens found for {len(user_ids)} users")
+        return []
+
+    results = await push_to_devices(
+        device_tokens, title, body,
+        asyncio.Semaphore(concurrency or config.PUSH_FANOUT_CONCURRENCY)
+    )
+    await record_deliveries(results, db)
+
+    delivered = sum(result.success for result in results)
+    logger.info(f"Fan-out to {len(user_ids)} users: {delivered}/{len(results)} devices delivered")
+    return results
+
+
+async def get_wall_member_ids(wall_id: str, db: AsyncSession) -> List[str]:
+    """Owner and members of a prayer wall"""
+    members = select(prayer_wall_users.c.user_id).where(prayer_wall_users.c.prayer_wall_id == wall_id)
+    owner = select(PrayerWall.owner_id).where(PrayerWall.id == wall_id)
+    result = await db.execute(members.union(owner))
+    return [user_id for user_id, in result.all()]
+
+
+async def send_notification_to_wall(
+    wall_id: str,
+    title: str,
+    body: str,
+    db: AsyncSession,
+    exclude_user_ids: Iterable[str] = ()
+) -> List[PushResult]:
+    """Notify everyone on a prayer wall, e.g. all but the user who triggered the event"""
+    excluded = set(exclude_user_ids)
+    user_ids = [user_id for user_id in await get_wall_member_ids(wall_id, db) if user_id not in excluded]
+    return await send_notification_to_users(user_ids, title, body, db)
+
+
+async def send_notification_to_user(
+    user_id: str,
+    title: str,
+    body: str,
+    db: AsyncSession
+):
+    try:
+        await send_notification_to_users([user_id], title, body, db)
     except Exception as e:
         await db.rollback()
         logger.error(f"Error sending notification: {e}")
         # Don't raise an exception here, just log the error
-        # This prevents notification errors from breaking the main functionality 
\ No newline at end of file
+        # This prevents notification errors from breaking the main functionality
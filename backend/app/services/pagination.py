@@ -0,0 +1,44 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: datetime, id: str) -> str:
+    """Opaque cursor for the row a page ended on, clients just hand it back"""
+    raw = json.dumps([created_at.isoformat(), id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(stmt, created_at_column, id_column, limit: int, cursor: Optional[str] = None):
+    """
+    Newest-first page of stmt on (created_at, id). Fetches one extra row so the caller
+    can tell whether there is a next page; with a composite index ending in
+    (created_at, id) each page is a single index range scan however deep it is.
+    """
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(created_at_column, id_column) < tuple_(created_at, id))
+    return stmt.order_by(created_at_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def next_cursor(rows: list, limit: int, key) -> Optional[str]:
+    """Cursor for the page after rows (fetched with keyset_page), None on the last page"""
+    if len(rows) <= limit:
+        return None
+    return encode_cursor(*key(rows[limit - 1]))
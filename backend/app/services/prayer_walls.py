@@ -1,9 +1,10 @@
 import logging
 from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
-from typing import List
+from typing import List, Tuple
 import uuid
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 import secrets
 from sqlalchemy.orm import selectinload
@@ -20,14 +21,25 @@ from app.schemas.prayer_walls import (PrayerWallCreate,
                                      PrayerWallResponse,
                                      WallUser,
                                      PrayerWallsResponse)
-from app.schemas.prayers import PrayerResponse
+from app.schemas.prayers import PrayerResponse, PrayersPage
 
-from app.services.notifications import send_notification_to_user
+from app.config import config
+from app.services.cache import TTLCache
+from app.services.notification_outbox import enqueue_notification, notification_dispatcher
+from app.services.pagination import DEFAULT_PAGE_SIZE, keyset_page, next_cursor
 
 logging.basicConfig(format="%(levelname)s - %(name)s -  %(message)s", level=logging.WARNING)
 logging.getLogger("prayer-api").setLevel(logging.INFO)
 logger = logging.getLogger("prayer-api")
 
+invite_preview_cache = TTLCache("invite_previews", config.INVITE_PREVIEW_CACHE_MAX_ENTRIES,
+                                config.INVITE_PREVIEW_CACHE_TTL_SECONDS)
+
+async def invalidate_wall_invites(wall_id: str, db: AsyncSession):
+    """Drop the cached previews of every invite to a wall. Only affects this worker."""
+    result = await db.execute(select(PrayerWallInvite.code).where(PrayerWallInvite.wall_id == wall_id))
+    for code in result.scalars():
+        invite_preview_cache.invalidate(code)
 
 
 async def process_create_prayer_wall(prayer_wall: PrayerWallCreate, db: AsyncSession, current_user: User):
@@ -73,74 +85,89 @@ async def process_create_prayer_wall(prayer_wall: PrayerWallCreate, db: AsyncSes
         logger.error(f"Error creating prayer wall: {e}")
         raise HTTPException(status_code=500, detail="Error creating prayer wall")
     
+async def load_wall_responses(wall_ids, db: AsyncSession) -> List[PrayerWallResponse]:
+    """
+    Build PrayerWallResponses with their member lists for the walls selected by wall_ids
+    (a select of wall ids), in a single query: every wall row joined with its members.
+    """
+    stmt = select(
+        PrayerWall,
+        User.id,
+        User.email,
+        prayer_wall_users.c.role
+    ).outerjoin(
+        prayer_wall_users,
+        prayer_wall_users.c.prayer_wall_id == PrayerWall.id
+    ).outerjoin(
+        User,
+        User.id == prayer_wall_users.c.user_id
+    ).where(
+        PrayerWall.id.in_(wall_ids)
+    ).order_by(PrayerWall.created_at, PrayerWall.id)
+
+    result = await db.execute(stmt)
+    walls = {}
+    wall_users = {}
+    for wall, user_id, email, role in result:
+        if wall.id not in walls:
+            walls[wall.id] = wall
+            wall_users[wall.id] = []
+        if user_id is not None:
+            wall_users[wall.id].append(WallUser(
+                id=f"{wall.id}_{user_id}",
+                user_id=user_id,
+                email=email,
+                role="owner" if user_id == wall.owner_id else role
+            ))
+
+    return [
+        PrayerWallResponse(
+            id=wall.id,
+            title=wall.title,
+            description=wall.description,
+            is_public=wall.is_public,
+            created_at=wall.created_at,
+            owner_id=wall.owner_id,
+            users=wall_users[wall.id]
+        )
+        for wall in walls.values()
+    ]
+
 async def process_get_prayer_walls(db: AsyncSession, current_user: User):
     try:
-        # Get walls with roles and users
-        stmt = select(
-            PrayerWall,
-            prayer_wall_users.c.role
-        ).outerjoin(
-            prayer_wall_users,
-            (prayer_wall_users.c.prayer_wall_id == PrayerWall.id) &
-            (prayer_wall_users.c.user_id == current_user.id)
-        ).where(
-            (PrayerWall.owner_id == current_user.id) |  # Walls they own
-            (PrayerWall.id.in_(  # Walls they're a member of
+        # Walls they own or are a member of
+        wall_ids = select(PrayerWall.id).where(
+            (PrayerWall.owner_id == current_user.id) |
+            (PrayerWall.id.in_(
                 select(prayer_wall_users.c.prayer_wall_id)
                 .where(prayer_wall_users.c.user_id == current_user.id)
             ))
         )
-        
-        result = await db.execute(stmt)
-        prayer_walls = []
-        
-        for wall, role in result:
-            # Get users for this wall
-            users_stmt = select(User, prayer_wall_users.c.role).join(
-                prayer_wall_users,
-                (prayer_wall_users.c.user_id == User.id) &
-                (prayer_wall_users.c.prayer_wall_id == wall.id)
-            )
-            users_result = await db.execute(users_stmt)
-            wall_users = []
-            
-            for user, user_role in users_result:
-                wall_users.append(WallUser(
-                    id=f"{wall.id}_{user.id}",
-                    user_id=user.id,
-                    email=user.email,
-                    role="owner" if user.id == wall.owner_id else user_role
-                ))
-            
-            wall_response = PrayerWallResponse(
-                id=wall.id,
-                title=wall.title,
-                description=wall.description,
-                is_public=wall.is_public,
-                created_at=wall.created_at,
-                owner_id=wall.owner_id,
-                users=wall_users
-            )
-            prayer_walls.append(wall_response)
-        print(prayer_walls)
+        prayer_walls = await load_wall_responses(wall_ids, db)
         return PrayerWallsResponse(prayer_walls=prayer_walls)
         
     except Exception as e:
         logger.error(f"Error getting prayer walls: {e}")
         raise HTTPException(status_code=500, detail="Error getting prayer walls")
     
-async def process_update_prayer_wall(prayer_wall: PrayerWallUpdate, db: AsyncSession, current_user: User):
+async def process_update_prayer_wall(wall_id: str, prayer_wall: PrayerWallUpdate, db: AsyncSession, current_user: User):
     try:
-        stmt = select(PrayerWall).where(PrayerWall.id == prayer_wall.id)
+        stmt = select(PrayerWall).where(PrayerWall.id == wall_id)
         result = await db.execute(stmt)
-        prayer_wall = result.scalar_one_or_none()
-        if not prayer_wall:
-            raise HTTPException(status_code=404, detail="Prayer wall not found")    
-        prayer_wall.title = prayer_wall.title
-        prayer_wall.description = prayer_wall.description
-        prayer_wall.is_public = prayer_wall.is_public
+        wall = result.scalar_one_or_none()
+        if not wall:
+            raise HTTPException(status_code=404, detail="Prayer wall not found")
+        if wall.owner_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to update this wall")
+        wall.title = prayer_wall.title
+        wall.description = prayer_wall.description
+        wall.is_public = prayer_wall.is_public
         await db.commit()
-        return prayer_wall
+        await invalidate_wall_invites(wall_id, db)
+        walls = await load_wall_responses(select(PrayerWall.id).where(PrayerWall.id == wall_id), db)
+        return walls[0]
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         logger.error(f"Error updating prayer wall: {e}")
@@ -174,6 +201,7 @@ async def process_delete_prayer_wall(prayer_wall_id: str, db: AsyncSession, curr
         )
         
         # Delete any invites for this wall
+        await invalidate_wall_invites(prayer_wall_id, db)
         await db.execute(
             delete(PrayerWallInvite).where(
                 PrayerWallInvite.wall_id == prayer_wall_id
@@ -193,7 +221,9 @@ async def process_delete_prayer_wall(prayer_wall_id: str, db: AsyncSession, curr
 async def process_get_wall_prayers(
     wall_id: str,
     db: AsyncSession,
-    current_user: User
+    current_user: User,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None
 ):
     try:
         # Get the prayer wall and verify user access in one query
@@ -209,19 +239,22 @@ async def process_get_wall_prayers(
         if not wall:
             raise HTTPException(status_code=404, detail="Prayer wall not found or not authorized")
             
-        # Get prayers for this wall with verse recommendations
-        prayers_stmt = select(Prayer).join(
-            prayer_wall_prayers,
-            (prayer_wall_prayers.c.prayer_id == Prayer.id) &
-            (prayer_wall_prayers.c.prayer_wall_id == wall_id)
-        ).options(selectinload(Prayer.verse_recommendations))
+        # Get a page of this wall's prayers, newest share first, with verse recommendations
+        prayers_stmt = keyset_page(
+            select(Prayer, prayer_wall_prayers.c.created_at).join(
+                prayer_wall_prayers,
+                (prayer_wall_prayers.c.prayer_id == Prayer.id) &
+                (prayer_wall_prayers.c.prayer_wall_id == wall_id)
+            ).options(selectinload(Prayer.verse_recommendations)),
+            prayer_wall_prayers.c.created_at, prayer_wall_prayers.c.prayer_id, limit, cursor
+        )
         
         result = await db.execute(prayers_stmt)
-        prayers = result.scalars().all()
+        rows = result.all()
         
         # Format the response to match process_get_prayers output
         prayers_list = []
-        for prayer in prayers:
+        for prayer, _ in rows[:limit]:
             prayer_response = PrayerResponse(
                 id=prayer.id,
                 transcription=prayer.transcription,
@@ -235,12 +268,43 @@ async def process_get_wall_prayers(
             )
             prayers_list.append(prayer_response)
             
-        return prayers_list
+        return PrayersPage(
+            prayers=prayers_list,
+            next_cursor=next_cursor(rows, limit, lambda row: (row[1], row[0].id))
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting wall prayers: {e}")
         raise HTTPException(status_code=500, detail="Error getting wall prayers")
 
+async def insert_wall_prayers(authorized, db: AsyncSession) -> Tuple[int, List[str], List[str]]:
+    """
+    Share the (prayer_id, prayer_wall_id) pairs selected by authorized in a single
+    statement. authorized should carry the caller's permission checks in its WHERE
+    clause, so checking and writing is one round-trip however many rows there are.
+    Pairs that are already shared are skipped. Returns how many pairs authorized
+    matched, and the prayer ids and wall ids of the pairs actually added.
+    """
+    authorized = authorized.cte("authorized")
+    inserted = (
+        pg_insert(prayer_wall_prayers)
+        .from_select(["prayer_id", "prayer_wall_id"], select(authorized))
+        .on_conflict_do_nothing()
+        .returning(prayer_wall_prayers.c.prayer_id, prayer_wall_prayers.c.prayer_wall_id)
+        .cte("inserted")
+    )
+    result = await db.execute(
+        select(
+            select(func.count()).select_from(authorized).scalar_subquery(),
+            func.array_agg(inserted.c.prayer_id),
+            func.array_agg(inserted.c.prayer_wall_id)
+        )
+    )
+    matched, prayer_ids, wall_ids = result.one()
+    return matched, prayer_ids or [], wall_ids or []
+
 async def process_add_prayers_to_wall(
     wall_id: str,
     prayer_ids: List[str],
@@ -248,35 +312,31 @@ async def process_add_prayers_to_wall(
     current_user: User
 ):
     try:
-        # Get the prayer wall
-        result = await db.execute(select(PrayerWall).where(PrayerWall.id == wall_id))
-        wall = result.scalar_one_or_none()
-        
-        if not wall:
-            raise HTTPException(status_code=404, detail="Prayer wall not found")
-            
-        # Verify user has access to wall
-        if wall.owner_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized to add prayers to this wall")
-            
-        # Get the prayers
-        result = await db.execute(select(Prayer).where(Prayer.id.in_(prayer_ids)))
-        prayers = result.scalars().all()
-        
-        # Verify prayer ownership
-        for prayer in prayers:
-            if prayer.user_id != current_user.id:
-                raise HTTPException(
-                    status_code=403,
-                    detail=f"Not authorized to add prayer {prayer.id} to wall"
-                )
-        
-        # Add prayers to wall
-        wall.prayers.extend(prayers)
+        # Only the wall's owner may add, and only prayers of their own
+        authorized = select(Prayer.id, PrayerWall.id).join(
+            PrayerWall,
+            (PrayerWall.id == wall_id) & (PrayerWall.owner_id == Prayer.user_id)
+        ).where(
+            Prayer.id.in_(prayer_ids) & (Prayer.user_id == current_user.id)
+        )
+        matched, _, _ = await insert_wall_prayers(authorized, db)
+
+        if matched != len(set(prayer_ids)):
+            await db.rollback()
+            result = await db.execute(select(PrayerWall.owner_id).where(PrayerWall.id == wall_id))
+            owner_id = result.scalar_one_or_none()
+            if owner_id is None:
+                raise HTTPException(status_code=404, detail="Prayer wall not found")
+            if owner_id != current_user.id:
+                raise HTTPException(status_code=403, detail="Not authorized to add prayers to this wall")
+            raise HTTPException(status_code=403, detail="Not authorized to add one or more prayers to wall")
+
         await db.commit()
         
         return {"message": "Prayers added to wall successfully"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         logger.error(f"Error adding prayers to wall: {e}")
@@ -359,34 +419,65 @@ async def process_generate_invite_link(
         logger.error(f"Error generating invite: {e}")
         raise HTTPException(status_code=500, detail="Error generating invite")
 
+async def load_invite_preview(invite_code: str, db: AsyncSession):
+    """Invite and wall details for a preview in one query, counting members rather than loading them"""
+    member_count = (
+        select(func.count())
+        .select_from(prayer_wall_users)
+        .where(prayer_wall_users.c.prayer_wall_id == PrayerWall.id)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(
+            PrayerWallInvite.expires_at,
+            PrayerWall.title,
+            PrayerWall.description,
+            User.name,
+            member_count
+        )
+        .join(PrayerWall, PrayerWall.id == PrayerWallInvite.wall_id)
+        .join(User, User.id == PrayerWall.owner_id)
+        .where(PrayerWallInvite.code == invite_code)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    expires_at, title, description, owner_name, members = row
+    return {
+        "expires_at": expires_at,
+        "wall_title": title,
+        "description": description,
+        "owner_name": owner_name,
+        "member_count": members
+    }
+
 async def process_get_wall_invite(
     invite_code: str,
     db: AsyncSession,
     current_user: User
 ):
     try:
-        # Get invite details
-        result = await db.execute(
-            select(PrayerWallInvite, PrayerWall)
-            .join(PrayerWall)
-            .where(PrayerWallInvite.code == invite_code)
+        # Shared links get opened by a whole group chat at once, so previews are cached briefly
+        preview = await invite_preview_cache.get_or_create(
+            invite_code, lambda: load_invite_preview(invite_code, db)
         )
-        invite, wall = result.one_or_none()
         
-        if not invite or not wall:
+        if not preview:
             raise HTTPException(status_code=404, detail="Invalid invite link")
             
-        if invite.expires_at and invite.expires_at < datetime.now():
+        if preview["expires_at"] and preview["expires_at"] < datetime.now():
             raise HTTPException(status_code=400, detail="Invite link has expired")
             
         # Return wall preview info
         return {
-            "wall_title": wall.title,
-            "description": wall.description,
-            "owner_name": wall.owner.name,  # Assuming you have this relationship
-            "member_count": len(wall.users)
+            "wall_title": preview["wall_title"],
+            "description": preview["description"],
+            "owner_name": preview["owner_name"],
+            "member_count": preview["member_count"]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting invite: {e}")
         raise HTTPException(status_code=500, detail="Error getting invite details")
@@ -428,22 +519,21 @@ async def process_join_wall_with_invite(
             role='member'
         )
         await db.execute(stmt)
-        
-        # Commit the membership addition first to ensure it succeeds
+
+        # Queue the owner's notification in the same transaction, the dispatcher sends it
+        enqueue_notification(
+            db,
+            user_id=wall.owner_id,
+            title="New Prayer Wall Member",
+            body=f"{current_user.email} joined your prayer wall: {wall.title}",
+            event_type="wall_join",
+            group_key=f"wall:{wall.id}",
+            group_label=wall.title
+        )
         await db.commit()
-        
-        # Try to send notification, but don't let it break the main functionality
-        try:
-            # Notify wall owner
-            await send_notification_to_user(
-                user_id=wall.owner_id,
-                title="New Prayer Wall Member",
-                body=f"{current_user.email} joined your prayer wall: {wall.title}",
-                db=db
-            )
-        except Exception as e:
-            logger.error(f"Failed to send notification when user joined wall: {e}")
-            # Don't raise an exception here, as the user has already joined successfully
+        notification_dispatcher.wake()
+        # The member count in this wall's invite previews just changed
+        await invalidate_wall_invites(wall.id, db)
         
         return {"message": "Joined prayer wall successfully"}
         
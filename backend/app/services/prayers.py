@@ -1,32 +1,46 @@
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import List
+from typing import List, AsyncIterator
+import asyncio
+import hashlib
+import json
+import re
 import uuid
-import tempfile
 import os
 
-from fastapi import HTTPException, UploadFile, File
+from fastapi import HTTPException, UploadFile, File, WebSocket, status
 from fastapi.encoders import jsonable_encoder 
+from fastapi.responses import StreamingResponse
 
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, literal
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.documents import Document
+from langchain_core.output_parsers.openai_tools import JsonOutputKeyToolsParser
 from app.models import Prayer, User, PrayerWall, prayer_wall_users, prayer_wall_prayers, PrayerVerseRecommendation
+from app.config import config
 from app.config.llm import oai_llm
+from app.db.database import AsyncSessionLocal
 from app.schemas.prayers import (PrayerText, 
                                  ParsedPrayer, 
                                  PrayerCreate, 
                                  PrayerUpdate, 
                                  PrayerDelete,
                                  PrayerResponse,
-                                 PrayerWallsResponse)
+                                 PrayersPage,
+                                 PrayerWallsResponse,
+                                 VerseRecommendationResponse)
 from app.schemas.llm import Prayer as LLMPrayer, PrayerList as LLMPrayerList
-from app.schemas.prayer_walls import PrayerWallResponse
-from backend.app.services.util import transcribe_audio
+from backend.app.services.util import (transcribe_audio, split_transcript, iter_upload, hash_upload,
+                                       AudioTooLargeError, AUDIO_CONTENT_TYPES)
 
+from .cache import TTLCache
+from .live_transcription import LiveTranscriber
+from .notification_outbox import enqueue_wall_event
+from .pagination import DEFAULT_PAGE_SIZE, keyset_page, next_cursor
+from .prayer_walls import insert_wall_prayers, load_wall_responses
 from .prompts import PRAYER_PARSE_SYSTEM_PROMPT
 from .verse_recommendations import generate_verse_recommendations, vectorize_docs
 
@@ -34,6 +48,16 @@ logging.basicConfig(format="%(levelname)s - %(name)s -  %(message)s", level=logg
 logging.getLogger("prayer-api").setLevel(logging.INFO)
 logger = logging.getLogger("prayer-api")
 
+def _cancel_recommendations(key, task: asyncio.Task):
+    task.cancel()
+
+# Speculative verse recommendation tasks from confirm=True pipeline runs, waiting for
+# the prayer to be confirmed, keyed by _recommendation_key. Dropping one cancels it.
+pipeline_recommendations = TTLCache("pipeline_recommendations", config.AUDIO_CACHE_MAX_ENTRIES,
+                                    config.PIPELINE_PENDING_TTL_SECONDS, on_evict=_cancel_recommendations)
+transcription_cache = TTLCache("audio_transcriptions", config.AUDIO_CACHE_MAX_ENTRIES, config.AUDIO_CACHE_TTL_SECONDS)
+parsed_audio_cache = TTLCache("audio_parsed_prayers", config.AUDIO_CACHE_MAX_ENTRIES, config.AUDIO_CACHE_TTL_SECONDS)
+
 
 
 async def process_create_prayer(prayer: Prayer, db: AsyncSession, current_user: User):
@@ -53,17 +77,18 @@ async def process_create_prayer(prayer: Prayer, db: AsyncSession, current_user:
         raise HTTPException(status_code=500, detail="Error creating prayer")
     
 
-async def process_get_prayers(db: AsyncSession, current_user: User):
+async def process_get_prayers(db: AsyncSession, current_user: User, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None):
+    stmt = keyset_page(
+        select(Prayer)
+        .where(Prayer.user_id == current_user.id)
+        .options(selectinload(Prayer.verse_recommendations)),
+        Prayer.created_at, Prayer.id, limit, cursor
+    )
     try:
-        print(f"Getting prayers: {current_user}")
-        result = await db.execute(
-            select(Prayer)
-            .where(Prayer.user_id == current_user.id)
-            .options(selectinload(Prayer.verse_recommendations))
-        )
+        result = await db.execute(stmt)
         prayers = result.scalars().all()
         prayers_list = []
-        for prayer in prayers:
+        for prayer in prayers[:limit]:
             prayer_response = PrayerResponse(
                 id=prayer.id,
                 transcription=prayer.transcription,
@@ -76,7 +101,10 @@ async def process_get_prayers(db: AsyncSession, current_user: User):
                 verse_recommendations=prayer.verse_recommendations
             )
             prayers_list.append(prayer_response)
-        return prayers_list
+        return PrayersPage(
+            prayers=prayers_list,
+            next_cursor=next_cursor(prayers, limit, lambda prayer: (prayer.created_at, prayer.id))
+        )
     except Exception as e:
         await db.rollback()
         logger.error(f"Error getting prayers: {e}")
@@ -119,34 +147,103 @@ async def process_delete_prayer(prayer_id: str, db: AsyncSession):
 
 
 
+def _prayer_parse_messages(prayer_text: str):
+    user_message = HumanMessage(content=f"Parse this prayer: {prayer_text}")
+    return [SystemMessage(content=PRAYER_PARSE_SYSTEM_PROMPT)] + [user_message]
+
+def _to_parsed_prayer(prayer: LLMPrayer, prayer_text: str) -> ParsedPrayer:
+    return ParsedPrayer(id=str(uuid.uuid4()),
+                        transcription=prayer_text,
+                        entity=prayer.entity,
+                        synopsis=prayer.synopsis,
+                        description=prayer.description,
+                        prayer_type=prayer.prayer_type)
+
+async def _parse_prayer_chunk(prayer_text: str) -> List[LLMPrayer]:
+    structured_prayer_llm = oai_llm.with_structured_output(LLMPrayerList)
+    response = await structured_prayer_llm.ainvoke(_prayer_parse_messages(prayer_text))
+    return response.prayers
+
+def _prayer_key(prayer: LLMPrayer):
+    synopsis = re.sub(r"[^\w\s]", "", prayer.synopsis.lower())
+    return prayer.entity.strip().lower(), " ".join(synopsis.split())
+
+def _dedupe_prayers(prayers: List[LLMPrayer]) -> List[LLMPrayer]:
+    """Drop prayers repeated across chunks, matching on entity and normalized synopsis"""
+    seen = set()
+    unique_prayers = []
+    for prayer in prayers:
+        key = _prayer_key(prayer)
+        if key not in seen:
+            seen.add(key)
+            unique_prayers.append(prayer)
+    return unique_prayers
+
+async def _parse_long_prayer_text(chunks: List[str]) -> List[LLMPrayer]:
+    """Parse transcript chunks concurrently and merge the results in transcript order"""
+    semaphore = asyncio.Semaphore(config.PRAYER_CHUNK_CONCURRENCY)
+
+    async def parse_chunk(chunk: str):
+        async with semaphore:
+            return await _parse_prayer_chunk(chunk)
+
+    results = await asyncio.gather(*(parse_chunk(chunk) for chunk in chunks))
+    return _dedupe_prayers([prayer for chunk_prayers in results for prayer in chunk_prayers])
+
 async def process_text_prayers(prayer: PrayerText):
     try:
         prayer_text = prayer.text
-        structured_prayer_llm = oai_llm.with_structured_output(LLMPrayerList)
-        user_message = HumanMessage(content=f"Parse this prayer: {prayer_text}")
-        messages = [SystemMessage(content=PRAYER_PARSE_SYSTEM_PROMPT)] + [user_message]
-        response = structured_prayer_llm.invoke(messages)
-        
-        prayers = response.prayers
-        print(f"Prayers: {prayers}")
-        prayers_list = []
-
-        for prayer in prayers:
-
-            parsed_prayer = ParsedPrayer(id=str(uuid.uuid4()),
-                          transcription=prayer_text,
-                          entity=prayer.entity,
-                          synopsis=prayer.synopsis,
-                          description=prayer.description,
-                          prayer_type=prayer.prayer_type)
-            prayers_list.append(parsed_prayer)
+        chunks = split_transcript(prayer_text, config.PRAYER_CHUNK_MAX_CHARS)
+        if len(chunks) > 1:
+            logger.info(f"Parsing long prayer text in {len(chunks)} chunks")
+            prayers = await _parse_long_prayer_text(chunks)
+        else:
+            prayers = await _parse_prayer_chunk(prayer_text)
 
-        print("JSON response:", jsonable_encoder(prayers_list))
-        return prayers_list
+        # Every prayer keeps the full original transcription, not just its chunk
+        return [_to_parsed_prayer(prayer, prayer_text) for prayer in prayers]
     except Exception as e:
         logger.error(f"Error parsing prayers: {e}")
         raise HTTPException(status_code=500, detail="Error parsing prayers")
 
+async def stream_text_prayers(prayer: PrayerText) -> AsyncIterator[ParsedPrayer]:
+    """
+    Parse a prayer with a streamed tool call and yield each ParsedPrayer as soon as
+    the model has finished writing it, instead of waiting for the whole list.
+    """
+    prayer_text = prayer.text
+    streaming_llm = (
+        oai_llm.bind_tools([LLMPrayerList], tool_choice=LLMPrayerList.__name__)
+        | JsonOutputKeyToolsParser(key_name=LLMPrayerList.__name__, first_tool_only=True)
+    )
+
+    emitted = 0
+    items = []
+    async for partial in streaming_llm.astream(_prayer_parse_messages(prayer_text)):
+        items = (partial or {}).get("prayers") or []
+        # An item is complete once the model has started writing the next one
+        while emitted < len(items) - 1:
+            yield _to_parsed_prayer(LLMPrayer.model_validate(items[emitted]), prayer_text)
+            emitted += 1
+
+    for item in items[emitted:]:
+        yield _to_parsed_prayer(LLMPrayer.model_validate(item), prayer_text)
+
+async def process_text_prayers_stream(prayer: PrayerText) -> AsyncIterator[str]:
+    """
+    NDJSON body for the streaming parse endpoint: one "prayer" event per parsed prayer,
+    then a "done" event, or an "error" event if parsing fails part way through.
+    """
+    count = 0
+    try:
+        async for parsed_prayer in stream_text_prayers(prayer):
+            count += 1
+            yield json.dumps({"event": "prayer", "prayer": jsonable_encoder(parsed_prayer)}) + "\n"
+        yield json.dumps({"event": "done", "count": count}) + "\n"
+    except Exception as e:
+        logger.error(f"Error streaming parsed prayers: {e}")
+        yield json.dumps({"event": "error", "detail": "Error parsing prayers"}) + "\n"
+
 # @router.post("/process-audio", response_model=List[ParsedPrayer])
 # async def process_audio(
 #     audio: UploadFile = File(...),
@@ -154,37 +251,151 @@ async def process_text_prayers(prayer: PrayerText):
 # ):
 #    
 
-async def process_audio_prayers(prayer_audio: UploadFile = File(...)):
+async def _transcribe_upload(prayer_audio: UploadFile) -> tuple:
     """
-    Process an audio prayer recording and return parsed prayers.
-    The audio is received as a file upload and processed transiently.
+    Validate an audio upload and transcribe it, returning (audio hash, PrayerText).
+    The upload is streamed to the transcription service in chunks and never
+    buffered whole, and transcriptions are cached by a hash of the audio.
     """
-    if not prayer_audio.filename.lower().endswith(('.m4a', '.mp3', '.wav')):
+    file_extension = os.path.splitext(prayer_audio.filename or "")[1].lower()
+    if file_extension not in AUDIO_CONTENT_TYPES:
         raise HTTPException(status_code=400, detail="File must be an audio file (M4A, MP3, or WAV)")
-    
-    # Create a temporary file with the same extension as the upload
-    file_extension = os.path.splitext(prayer_audio.filename)[1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-        try:
-            # Write uploaded file to temporary file
-            contents = await prayer_audio.read()
-            temp_file.write(contents)
-            temp_file.flush()
-            
-            # Get transcription
-            prayer_text = await transcribe_audio(temp_file.name)
-            
+
+    max_bytes = config.MAX_AUDIO_UPLOAD_BYTES
+    if prayer_audio.size is not None and prayer_audio.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Audio file must be at most {max_bytes} bytes")
+
+    try:
+        audio_hash = await hash_upload(prayer_audio, max_bytes)
+
+        async def transcribe():
+            return await transcribe_audio(
+                iter_upload(prayer_audio, max_bytes),
+                AUDIO_CONTENT_TYPES[file_extension],
+            )
+
+        prayer_text = await transcription_cache.get_or_create(audio_hash, transcribe)
+        return audio_hash, prayer_text
+    except AudioTooLargeError:
+        raise HTTPException(status_code=413, detail=f"Audio file must be at most {max_bytes} bytes")
+    except Exception as e:
+        logger.error(f"Error processing audio: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing audio: {str(e)}")
+
+async def process_audio_prayers(prayer_audio: UploadFile, current_user: User):
+    """
+    Process an audio prayer recording and return parsed prayers.
+    The prayers parsed for each user are cached by a hash of the audio so a
+    retried upload of the same recording is answered from memory.
+    """
+    audio_hash, prayer_text = await _transcribe_upload(prayer_audio)
+    try:
+        async def parse():
             # Process the transcribed text into prayers
-            parsed_prayers = await process_text_prayers(prayer_text)
-            
-            return parsed_prayers
-            
+            return await process_text_prayers(prayer_text)
+
+        if not config.AUDIO_CACHE_PARSED_PRAYERS:
+            return await parse()
+        # Keyed per user so a retry gets back the same prayer ids it may already have saved
+        parsed_prayers = await parsed_audio_cache.get_or_create((current_user.id, audio_hash), parse)
+        return parsed_prayers
+
+    except Exception as e:
+        logger.error(f"Error processing audio: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing audio: {str(e)}")
+
+async def process_live_audio_prayers(websocket: WebSocket, transcriber: LiveTranscriber,
+                                     encoding: str = None, sample_rate: int = None):
+    """
+    Relay audio from the client to a live transcription session while the user is
+    still speaking, and parse the prayers as soon as the audio stream ends.
+
+    The client sends binary audio frames, then a text frame {"type": "stop"}.
+    The server sends {"event": "transcript", "text", "is_final"} as results arrive,
+    then one {"event": "prayer"} per parsed prayer and {"event": "done", "count"},
+    or {"event": "error", "detail"} on failure.
+    """
+    await websocket.accept()
+    try:
+        session = await transcriber.open(encoding, sample_rate)
+    except Exception as e:
+        logger.error(f"Error starting live transcription: {e}")
+        await websocket.send_json({"event": "error", "detail": "Error starting transcription"})
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+
+    final_segments = []
+
+    async def relay_transcripts():
+        async for segment in session:
+            if segment.is_final:
+                final_segments.append(segment.text)
+            await websocket.send_json({"event": "transcript", "text": segment.text, "is_final": segment.is_final})
+
+    async with session:
+        relay = asyncio.create_task(relay_transcripts())
+        try:
+            received = 0
+            while not relay.done():
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    # Nobody left to send prayers to
+                    return
+                if message.get("bytes"):
+                    received += len(message["bytes"])
+                    if received > config.MAX_AUDIO_UPLOAD_BYTES:
+                        await websocket.send_json({"event": "error", "detail": "Audio stream is too large"})
+                        await websocket.close(code=status.WS_1009_MESSAGE_TOO_BIG)
+                        return
+                    await session.send(message["bytes"])
+                elif message.get("text") and json.loads(message["text"]).get("type") == "stop":
+                    break
+
+            # Let the backend flush the last results before parsing
+            if not relay.done():
+                await session.finish()
+            await asyncio.wait_for(relay, config.DEEPGRAM_TIMEOUT_SECONDS)
         except Exception as e:
-            logger.error(f"Error processing audio: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error processing audio: {str(e)}")
+            logger.error(f"Error during live transcription: {e}")
+            await websocket.send_json({"event": "error", "detail": "Error transcribing audio"})
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+            return
         finally:
-            # Always clean up the temporary file
-            os.unlink(temp_file.name)
+            relay.cancel()
+
+    try:
+        transcript = " ".join(final_segments).strip()
+        prayers = await process_text_prayers(PrayerText(text=transcript)) if transcript else []
+        for parsed_prayer in prayers:
+            await websocket.send_json({"event": "prayer", "prayer": jsonable_encoder(parsed_prayer)})
+        await websocket.send_json({"event": "done", "count": len(prayers)})
+        await websocket.close()
+    except Exception as e:
+        logger.error(f"Error parsing live transcription: {e}")
+        await websocket.send_json({"event": "error", "detail": "Error parsing prayers"})
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+
+def _prayer_document(prayer: ParsedPrayer) -> Document:
+    """Vector store document for a user's prayer"""
+    document_prayer_content = f"Prayer for {prayer.entity}\n{prayer.synopsis}\nDescription: {prayer.description}"
+    return Document(
+        page_content=document_prayer_content,
+        metadata={"prayer_type": prayer.prayer_type,
+                  "entity": prayer.entity,
+                  "synopsis": prayer.synopsis,
+                  "description": prayer.description,
+                  "id": prayer.id}
+    )
+
+def _prayer_model(prayer: ParsedPrayer, user_id: str) -> Prayer:
+    return Prayer(
+        id=str(prayer.id),
+        user_id=user_id,
+        transcription=prayer.transcription,
+        entity=prayer.entity,
+        synopsis=prayer.synopsis,
+        description=prayer.description,
+        prayer_type=prayer.prayer_type)
 
 async def process_bulk_create_prayer(prayers: List[ParsedPrayer], db: AsyncSession, current_user: User):
     try:
@@ -192,26 +403,8 @@ async def process_bulk_create_prayer(prayers: List[ParsedPrayer], db: AsyncSessi
         document_prayers = []
 
         for prayer in prayers:
-            document_prayer_content = f"Prayer for {prayer.entity}\n{prayer.synopsis}\nDescription: {prayer.description}"
-            prayer_document = Document(
-                page_content=document_prayer_content,
-                metadata={"prayer_type": prayer.prayer_type,
-                          "entity": prayer.entity,
-                          "synopsis": prayer.synopsis,
-                          "description": prayer.description,
-                          "id": prayer.id}
-            )
-            document_prayers.append(prayer_document)
-
-            prayer = Prayer(
-                id=str(prayer.id),
-                user_id=current_user.id,
-                transcription=prayer.transcription,
-                entity=prayer.entity,
-                synopsis=prayer.synopsis,
-                description=prayer.description,
-                prayer_type=prayer.prayer_type)
-            prayers_list.append(prayer)
+            document_prayers.append(_prayer_document(prayer))
+            prayers_list.append(_prayer_model(prayer, current_user.id))
         print(f"Prayers list: {prayers_list}")
         db.add_all(prayers_list)
         await db.flush()  # Commit the prayers first
@@ -232,6 +425,171 @@ async def process_bulk_create_prayer(prayers: List[ParsedPrayer], db: AsyncSessi
         raise HTTPException(status_code=500, detail="Error bulk creating prayers")
 
 
+def _pipeline_event(event: str, **data) -> str:
+    return json.dumps({"event": event, **jsonable_encoder(data)}) + "\n"
+
+async def _iter_parsed_prayers(prayer_text: PrayerText) -> AsyncIterator[ParsedPrayer]:
+    """Yield prayers as they are parsed; long transcripts go through the chunked parser"""
+    if len(split_transcript(prayer_text.text, config.PRAYER_CHUNK_MAX_CHARS)) > 1:
+        for parsed_prayer in await process_text_prayers(prayer_text):
+            yield parsed_prayer
+    else:
+        async for parsed_prayer in stream_text_prayers(prayer_text):
+            yield parsed_prayer
+
+def _log_recommendation_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Error generating verse recommendations: {task.exception()}")
+
+def _recommendation_key(prayer: ParsedPrayer, user_id: str) -> tuple:
+    """
+    The prayer id comes from the client, so the key also covers the text the
+    recommendations are generated from: a prayer edited before confirming starts over
+    """
+    content = json.dumps([prayer.entity, prayer.synopsis, prayer.description])
+    return (user_id, prayer.id, hashlib.sha256(content.encode()).hexdigest())
+
+def _generate_recommendations(prayer: ParsedPrayer) -> asyncio.Task:
+    task = asyncio.create_task(generate_verse_recommendations(prayer))
+    task.add_done_callback(_log_recommendation_failure)
+    return task
+
+def _speculate_recommendations(prayer: ParsedPrayer, user_id: str) -> asyncio.Task:
+    """Start recommendations for a prayer that has yet to be confirmed, leaving the task for the confirm"""
+    key = _recommendation_key(prayer, user_id)
+    task = pipeline_recommendations.get(key)
+    if task is None:
+        task = _generate_recommendations(prayer)
+        pipeline_recommendations.set(key, task)
+    return task
+
+def _claim_recommendations(prayer: ParsedPrayer, user_id: str) -> asyncio.Task:
+    """
+    Take over the speculative task a confirm=True run started for this prayer, or start
+    one. The caller owns the task from here on and cancels it if it goes unused.
+    """
+    task = pipeline_recommendations.pop(_recommendation_key(prayer, user_id))
+    return task if task is not None else _generate_recommendations(prayer)
+
+async def _save_recommendations(db: AsyncSession, task: asyncio.Task, prayer_id: str) -> str:
+    try:
+        verse_recommendations = task.result()
+        db.add_all(verse_recommendations)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error saving verse recommendations for prayer {prayer_id}: {e}")
+        return _pipeline_event("error", prayer_id=prayer_id, detail="Error generating verse recommendations")
+    return _pipeline_event("recommendations", prayer_id=prayer_id, verse_recommendations=[
+        VerseRecommendationResponse.model_validate(recommendation) for recommendation in verse_recommendations
+    ])
+
+async def _persist_prayers_stream(prayers: AsyncIterator[ParsedPrayer], user_id: str,
+                                  announce: bool = True) -> AsyncIterator[str]:
+    """
+    Save each prayer the moment it arrives and start its verse recommendations right
+    away, so recommendations for the first prayer are underway while later ones are
+    still being parsed. Uses its own session because the body is streamed after the
+    request's dependencies have been closed.
+    """
+    pending = {}
+    documents = []
+    try:
+        async with AsyncSessionLocal() as db:
+            async for parsed_prayer in prayers:
+                if announce:
+                    yield _pipeline_event("prayer", prayer=parsed_prayer)
+                try:
+                    db.add(_prayer_model(parsed_prayer, user_id))
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    logger.error(f"Error saving prayer {parsed_prayer.id}: {e}")
+                    yield _pipeline_event("error", prayer_id=parsed_prayer.id, detail="Error saving prayer")
+                    continue
+                yield _pipeline_event("saved", prayer_id=parsed_prayer.id)
+                documents.append(_prayer_document(parsed_prayer))
+                pending[_claim_recommendations(parsed_prayer, user_id)] = parsed_prayer.id
+
+                # Report recommendations that finished while this prayer was being parsed
+                for task in [task for task in pending if task.done()]:
+                    yield await _save_recommendations(db, task, pending.pop(task))
+
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield await _save_recommendations(db, task, pending.pop(task))
+    finally:
+        # The client went away (or the stream failed) before these were saved
+        for task in pending:
+            task.cancel()
+
+    if documents:
+        try:
+            await vectorize_docs(documents, user_id)
+        except Exception as e:
+            logger.error(f"Error vectorizing prayers: {e}")
+    yield _pipeline_event("done", count=len(documents))
+
+async def process_audio_pipeline(prayer_audio: UploadFile, current_user: User, confirm: bool = False) -> StreamingResponse:
+    """
+    Transcribe, parse, save and recommend verses in one request, streaming NDJSON
+    progress events: "transcript", then per prayer "prayer", "saved" and
+    "recommendations", then "done" (or "error").
+
+    With confirm=True nothing is saved: the stream ends with "pending" once every
+    prayer is parsed, while recommendations are generated speculatively as the user
+    reviews them. Posting the prayers to keep to /prayers/pipeline/confirm saves
+    them and picks up the recommendations already underway.
+    """
+    _, prayer_text = await _transcribe_upload(prayer_audio)
+    user_id = current_user.id
+
+    async def events():
+        yield _pipeline_event("transcript", text=prayer_text.text)
+        try:
+            if not confirm:
+                async for event in _persist_prayers_stream(_iter_parsed_prayers(prayer_text), user_id):
+                    yield event
+                return
+
+            parsed_prayers = []
+            try:
+                async for parsed_prayer in _iter_parsed_prayers(prayer_text):
+                    parsed_prayers.append(parsed_prayer)
+                    if config.PIPELINE_SPECULATIVE_RECOMMENDATIONS:
+                        _speculate_recommendations(parsed_prayer, user_id)
+                    yield _pipeline_event("prayer", prayer=parsed_prayer)
+                yield _pipeline_event("pending", count=len(parsed_prayers))
+            except BaseException:
+                # Without the "pending" event there is nothing to confirm
+                for parsed_prayer in parsed_prayers:
+                    task = pipeline_recommendations.pop(_recommendation_key(parsed_prayer, user_id))
+                    if task is not None:
+                        task.cancel()
+                raise
+        except Exception as e:
+            logger.error(f"Error in audio pipeline: {e}")
+            yield _pipeline_event("error", detail="Error processing prayers")
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+async def process_confirm_pipeline(prayers: List[ParsedPrayer], current_user: User) -> StreamingResponse:
+    """Save the prayers the user kept from a confirm=True pipeline run, streaming the same events"""
+    async def kept_prayers():
+        for prayer in prayers:
+            yield prayer
+
+    async def events():
+        try:
+            async for event in _persist_prayers_stream(kept_prayers(), current_user.id, announce=False):
+                yield event
+        except Exception as e:
+            logger.error(f"Error confirming prayers: {e}")
+            yield _pipeline_event("error", detail="Error saving prayers")
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 async def process_share_prayer_to_walls(
     prayer_id: str,
     wall_ids: List[str],
@@ -239,45 +597,46 @@ async def process_share_prayer_to_walls(
     current_user: User
 ):
     try:
-        # Get the prayer
-        result = await db.execute(select(Prayer).where(Prayer.id == prayer_id))
-        prayer = result.scalar_one_or_none()
-        
-        if not prayer:
-            raise HTTPException(status_code=404, detail="Prayer not found")
-            
-        # Verify prayer ownership
-        if prayer.user_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized to share this prayer")
-            
-        # Get the prayer walls with access check
-        result = await db.execute(
-            select(PrayerWall).join(
-                prayer_wall_users,
-                (prayer_wall_users.c.prayer_wall_id == PrayerWall.id) &
-                (prayer_wall_users.c.user_id == current_user.id)
-            ).where(PrayerWall.id.in_(wall_ids))
+        # The prayer must be the caller's and they must be a member of every wall
+        authorized = select(Prayer.id, prayer_wall_users.c.prayer_wall_id).join(
+            prayer_wall_users,
+            (prayer_wall_users.c.user_id == Prayer.user_id) &
+            prayer_wall_users.c.prayer_wall_id.in_(wall_ids)
+        ).where(
+            (Prayer.id == prayer_id) & (Prayer.user_id == current_user.id)
         )
-        walls = result.scalars().all()
-        
-        if len(walls) != len(wall_ids):
+        matched, _, shared_wall_ids = await insert_wall_prayers(authorized, db)
+
+        if matched != len(set(wall_ids)):
+            await db.rollback()
+            result = await db.execute(select(Prayer.user_id).where(Prayer.id == prayer_id))
+            owner_id = result.scalar_one_or_none()
+            if owner_id is None:
+                raise HTTPException(status_code=404, detail="Prayer not found")
+            if owner_id != current_user.id:
+                raise HTTPException(status_code=403, detail="Not authorized to share this prayer")
             raise HTTPException(
                 status_code=403,
                 detail="Not authorized to access one or more prayer walls"
             )
-        
-        # Add prayer to walls using the association table
-        for wall in walls:
-            stmt = prayer_wall_prayers.insert().values(
-                prayer_id=prayer_id,
-                prayer_wall_id=wall.id
+
+        # Let the other members know, bursts of shares reach them as one digest.
+        # Walls the prayer was already on don't hear about it again.
+        if shared_wall_ids:
+            synopsis = select(Prayer.synopsis).where(Prayer.id == prayer_id).scalar_subquery()
+            await enqueue_wall_event(
+                db,
+                wall_ids=shared_wall_ids,
+                event_type="wall_share",
+                body=literal(f"{current_user.name or current_user.email} shared a prayer: ") + synopsis,
+                exclude_user_id=current_user.id
             )
-            await db.execute(stmt)
-            
         await db.commit()
         
         return {"message": "Prayer shared successfully"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         logger.error(f"Error sharing prayer to walls: {e}")
@@ -336,35 +695,11 @@ async def process_get_prayer_walls(
         if prayer.user_id != current_user.id:
             raise HTTPException(status_code=403, detail="Not authorized to view this prayer's walls")
             
-        # Get walls with roles
-        stmt = select(
-            PrayerWall,
-            prayer_wall_users.c.role
-        ).join(
-            prayer_wall_prayers,
-            prayer_wall_prayers.c.prayer_wall_id == PrayerWall.id
-        ).outerjoin(
-            prayer_wall_users,
-            (prayer_wall_users.c.prayer_wall_id == PrayerWall.id) &
-            (prayer_wall_users.c.user_id == current_user.id)
-        ).where(
+        # Walls the prayer is shared on, with their members
+        wall_ids = select(prayer_wall_prayers.c.prayer_wall_id).where(
             prayer_wall_prayers.c.prayer_id == prayer_id
         )
-        
-        result = await db.execute(stmt)
-        prayer_walls = []
-        
-        for wall, role in result:
-            wall_response = PrayerWallResponse(
-                id=wall.id,
-                title=wall.title,
-                description=wall.description,
-                is_public=wall.is_public,
-                created_at=wall.created_at,
-                owner_id=wall.owner_id,
-                role="owner" if wall.owner_id == current_user.id else role
-            )
-            prayer_walls.append(wall_response)
+        prayer_walls = await load_wall_responses(wall_ids, db)
             
         return PrayerWallsResponse(prayer_walls=prayer_walls)
         
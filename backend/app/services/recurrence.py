@@ -0,0 +1,111 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterator, List, Optional
+from zoneinfo import ZoneInfo
+
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+
+@dataclass
+class RecurrenceRule:
+    """
+    The subset of RFC 5545 RRULE that reminders need: FREQ=DAILY or WEEKLY with
+    INTERVAL, BYDAY, BYHOUR, BYMINUTE and UNTIL. Times are wall-clock times in the
+    reminder's timezone, so a 7am reminder stays at 7am across DST changes.
+    """
+    freq: str
+    interval: int = 1
+    by_day: List[int] = field(default_factory=list)  # 0 = Monday, like date.weekday()
+    by_hour: List[int] = field(default_factory=list)
+    by_minute: List[int] = field(default_factory=list)
+    until: Optional[str] = None
+
+    @classmethod
+    def parse(cls, rule: str) -> "RecurrenceRule":
+        """Parse e.g. "FREQ=WEEKLY;BYDAY=MO,WE;BYHOUR=7;BYMINUTE=30", raises ValueError on anything unsupported"""
+        parts = {}
+        for part in rule.strip().removeprefix("RRULE:").split(";"):
+            if not part:
+                continue
+            name, sep, value = part.partition("=")
+            if not sep or not value:
+                raise ValueError(f"Malformed rule part: {part}")
+            parts[name.upper()] = value.upper()
+
+        freq = parts.pop("FREQ", None)
+        if freq not in ("DAILY", "WEEKLY"):
+            raise ValueError("FREQ must be DAILY or WEEKLY")
+        parsed = cls(freq=freq)
+        try:
+            if "INTERVAL" in parts:
+                parsed.interval = int(parts.pop("INTERVAL"))
+            if "BYDAY" in parts:
+                parsed.by_day = sorted({WEEKDAYS.index(day) for day in parts.pop("BYDAY").split(",")})
+            if "BYHOUR" in parts:
+                parsed.by_hour = sorted({int(hour) for hour in parts.pop("BYHOUR").split(",")})
+            if "BYMINUTE" in parts:
+                parsed.by_minute = sorted({int(minute) for minute in parts.pop("BYMINUTE").split(",")})
+        except ValueError:
+            raise ValueError(f"Invalid value in rule: {rule}")
+        if "UNTIL" in parts:
+            parsed.until = parts.pop("UNTIL")
+            _parse_until(parsed.until, timezone.utc)
+        if parts:
+            raise ValueError(f"Unsupported rule parts: {', '.join(parts)}")
+
+        if parsed.interval < 1:
+            raise ValueError("INTERVAL must be at least 1")
+        if any(hour > 23 or hour < 0 for hour in parsed.by_hour):
+            raise ValueError("BYHOUR must be between 0 and 23")
+        if any(minute > 59 or minute < 0 for minute in parsed.by_minute):
+            raise ValueError("BYMINUTE must be between 0 and 59")
+        return parsed
+
+    def occurrences(self, dtstart: datetime, tz: str, after: datetime, before: datetime) -> Iterator[datetime]:
+        """
+        Occurrences in (after, before], as aware datetimes in ascending order. dtstart is
+        the naive local start of the series in tz; after and before are aware. Only the
+        days in the window are visited, so cost depends on the window, not the rule's age.
+        """
+        zone = ZoneInfo(tz)
+        until = _parse_until(self.until, zone) if self.until else None
+        hours = self.by_hour or [dtstart.hour]
+        minutes = self.by_minute or [dtstart.minute]
+        weekdays = self.by_day or [dtstart.weekday()]
+        start_day = dtstart.date()
+        start_week = start_day - timedelta(days=start_day.weekday())
+
+        day = max(start_day, after.astimezone(zone).date())
+        last_day = before.astimezone(zone).date()
+        while day <= last_day:
+            if self._matches(day, start_day, start_week, weekdays):
+                for hour in hours:
+                    for minute in minutes:
+                        local = datetime.combine(day, time(hour, minute))
+                        if local < dtstart:
+                            continue
+                        # Round-trip through UTC so times skipped by DST land on a real instant
+                        occurrence = local.replace(tzinfo=zone).astimezone(timezone.utc)
+                        if until and occurrence > until:
+                            return
+                        if after < occurrence <= before:
+                            yield occurrence
+            day += timedelta(days=1)
+
+    def _matches(self, day: date, start_day: date, start_week: date, weekdays: List[int]) -> bool:
+        if self.freq == "DAILY":
+            return (day - start_day).days % self.interval == 0 and (not self.by_day or day.weekday() in self.by_day)
+        week = (day - start_week).days // 7
+        return week % self.interval == 0 and day.weekday() in weekdays
+
+
+def _parse_until(value: str, zone) -> datetime:
+    """UNTIL is a date, a local date-time, or a UTC date-time ending in Z"""
+    try:
+        if len(value) == 8:
+            return datetime.strptime(value, "%Y%m%d").replace(hour=23, minute=59, second=59, tzinfo=zone)
+        if value.endswith("Z"):
+            return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        return datetime.strptime(value, "%Y%m%dT%H%M%S").replace(tzinfo=zone)
+    except ValueError:
+        raise ValueError(f"Invalid UNTIL: {value}")
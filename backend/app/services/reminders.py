@@ -0,0 +1,260 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import config
+from app.db.database import AsyncSessionLocal
+from app.models import NotificationOutbox, Prayer, PrayerNotification, PrayerReminderRule, User
+from app.schemas.notifications import ReminderRuleCreate
+from app.services.notification_outbox import notification_dispatcher
+from app.services.recurrence import RecurrenceRule
+
+logging.basicConfig(format="%(levelname)s - %(name)s -  %(message)s", level=logging.WARNING)
+logging.getLogger("prayer-api").setLevel(logging.INFO)
+logger = logging.getLogger("prayer-api")
+
+
+def reminder_message(synopses: List[str]) -> Dict[str, str]:
+    """One notification covering every reminder a user has due in this batch"""
+    if len(synopses) == 1:
+        return {"title": "Time to pray", "body": synopses[0] or "Take a moment to pray"}
+    named = [synopsis for synopsis in synopses if synopsis]
+    body = f"You have {len(synopses)} prayers to pray for"
+    if named:
+        body += ": " + ", ".join(named[:3]) + ("..." if len(named) > 3 else "")
+    return {"title": "Time to pray", "body": body}
+
+
+def expand_rule(rule: PrayerReminderRule, after: datetime, before: datetime) -> List[dict]:
+    """PrayerNotification rows for the rule's occurrences in (after, before], both naive server-local times"""
+    recurrence = RecurrenceRule.parse(rule.rrule)
+    return [
+        {
+            "user_id": rule.user_id,
+            "prayer_id": rule.prayer_id,
+            "rule_id": rule.id,
+            # scheduled_time is naive server-local time, like datetime.now()
+            "scheduled_time": occurrence.astimezone().replace(tzinfo=None),
+            "is_sent": False,
+        }
+        for occurrence in recurrence.occurrences(rule.starts_at, rule.timezone, after.astimezone(), before.astimezone())
+    ]
+
+
+class ReminderScheduler:
+    """
+    Turns due PrayerNotification rows into notifications. Each round claims a batch of
+    due reminders in one statement (UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP
+    LOCKED) RETURNING), so any number of workers can poll concurrently, and in the same
+    transaction queues one outbox notification per user. Delivery and retries are left
+    to the outbox dispatcher, which keeps a slow APNs from holding row locks here.
+
+    Recurring rules are expanded lazily: only rules whose occurrences run out within half
+    a window are touched, and only the next window of occurrences is materialized.
+    """
+
+    def __init__(self, batch_size: int = None, poll_seconds: float = None, window: timedelta = None):
+        self.batch_size = batch_size or config.REMINDER_BATCH_SIZE
+        self.poll_seconds = poll_seconds or config.REMINDER_POLL_SECONDS
+        self.window = window or timedelta(hours=config.REMINDER_EXPANSION_WINDOW_HOURS)
+        self._task: asyncio.Task = None
+        self.claimed = 0
+        self.queued = 0
+        self.expanded = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.expand_rules_once()
+                claimed = await self.schedule_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Reminder scheduler round failed: {e}")
+                claimed = 0
+            # Keep draining without sleeping while a backlog is building up at peak times
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_seconds)
+
+    async def expand_rules_once(self) -> int:
+        """Top up occurrences for one batch of rules that are about to run out, returns the number of rules expanded"""
+        now = datetime.now()
+        horizon = now + self.window
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(PrayerReminderRule)
+                .where(PrayerReminderRule.is_active & (PrayerReminderRule.expanded_until < now + self.window / 2))
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rules = result.scalars().all()
+            if not rules:
+                await db.rollback()
+                return 0
+
+            occurrences = []
+            for rule in rules:
+                # Occurrences missed while no scheduler was running are skipped rather than sent late
+                try:
+                    occurrences.extend(expand_rule(rule, max(rule.expanded_until, now), horizon))
+                except (ValueError, ZoneInfoNotFoundError) as e:
+                    logger.error(f"Deactivating reminder rule {rule.id}: {e}")
+                    rule.is_active = False
+                    continue
+                rule.expanded_until = horizon
+            if occurrences:
+                await db.execute(
+                    pg_insert(PrayerNotification).on_conflict_do_nothing(index_elements=["rule_id", "scheduled_time"]),
+                    occurrences
+                )
+            await db.commit()
+
+        self.expanded += len(rules)
+        return len(rules)
+
+    async def _claim(self, db: AsyncSession, now: datetime) -> list:
+        # NOT is_sent matches the partial index predicate, so this is an index range scan
+        due = (
+            select(PrayerNotification.id)
+            .where(~PrayerNotification.is_sent & (PrayerNotification.scheduled_time <= now))
+            .order_by(PrayerNotification.scheduled_time)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = (
+            update(PrayerNotification)
+            .where(PrayerNotification.id.in_(due))
+            .values(is_sent=True)
+            .returning(PrayerNotification.user_id, PrayerNotification.prayer_id)
+            .cte("claimed")
+        )
+        result = await db.execute(
+            select(claimed.c.user_id, Prayer.synopsis)
+            .outerjoin(Prayer, Prayer.id == claimed.c.prayer_id)
+        )
+        return result.all()
+
+    async def schedule_once(self) -> int:
+        """Claim one batch of due reminders and queue their notifications, returns the number claimed"""
+        async with AsyncSessionLocal() as db:
+            rows = await self._claim(db, datetime.now())
+            if not rows:
+                await db.rollback()
+                return 0
+
+            synopses_by_user: Dict[str, List[str]] = {}
+            for user_id, synopsis in rows:
+                synopses_by_user.setdefault(user_id, []).append(synopsis)
+
+            await db.execute(
+                insert(NotificationOutbox),
+                [{"user_id": user_id, **reminder_message(synopses)}
+                 for user_id, synopses in synopses_by_user.items()]
+            )
+            await db.commit()
+
+        self.claimed += len(rows)
+        self.queued += len(synopses_by_user)
+        notification_dispatcher.wake()
+        return len(rows)
+
+    def metrics(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "claimed": self.claimed,
+            "queued": self.queued,
+            "rules_expanded": self.expanded,
+        }
+
+
+reminder_scheduler = ReminderScheduler()
+
+
+async def process_create_reminder_rule(rule: ReminderRuleCreate, db: AsyncSession, current_user: User):
+    try:
+        RecurrenceRule.parse(rule.rrule)
+        zone = ZoneInfo(rule.timezone)
+    except (ValueError, ZoneInfoNotFoundError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid reminder rule: {e}")
+
+    if rule.prayer_id:
+        result = await db.execute(
+            select(Prayer.id).where((Prayer.id == rule.prayer_id) & (Prayer.user_id == current_user.id))
+        )
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Prayer not found")
+
+    try:
+        starts_at = rule.starts_at or datetime.now(zone)
+        if starts_at.tzinfo:
+            starts_at = starts_at.astimezone(zone).replace(tzinfo=None)
+        new_rule = PrayerReminderRule(
+            user_id=current_user.id,
+            prayer_id=rule.prayer_id,
+            rrule=rule.rrule,
+            timezone=rule.timezone,
+            starts_at=starts_at.replace(second=0, microsecond=0)
+        )
+        db.add(new_rule)
+        await db.commit()
+        await db.refresh(new_rule)
+        return new_rule
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error creating reminder rule: {e}")
+        raise HTTPException(status_code=500, detail="Error creating reminder")
+
+
+async def process_get_reminder_rules(db: AsyncSession, current_user: User):
+    result = await db.execute(
+        select(PrayerReminderRule)
+        .where((PrayerReminderRule.user_id == current_user.id) & PrayerReminderRule.is_active)
+        .order_by(PrayerReminderRule.created_at)
+    )
+    return result.scalars().all()
+
+
+async def process_delete_reminder_rule(rule_id: str, db: AsyncSession, current_user: User):
+    result = await db.execute(
+        select(PrayerReminderRule).where(
+            (PrayerReminderRule.id == rule_id) & (PrayerReminderRule.user_id == current_user.id)
+        )
+    )
+    rule = result.scalar_one_or_none()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Reminder not found")
+
+    try:
+        # Sent occurrences stay as history, the ones already expanded ahead are dropped
+        rule.is_active = False
+        await db.execute(
+            delete(PrayerNotification).where(
+                (PrayerNotification.rule_id == rule_id) & ~PrayerNotification.is_sent
+            )
+        )
+        await db.commit()
+        return {"message": "Reminder deleted successfully"}
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error deleting reminder rule: {e}")
+        raise HTTPException(status_code=500, detail="Error deleting reminder")
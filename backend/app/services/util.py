@@ -1,45 +1,126 @@
-from deepgram import (
-    DeepgramClient,
-    PrerecordedOptions,
-    FileSource,
-)
+import re
+import hashlib
+import json
+from typing import AsyncIterator, List, Optional
+
+import httpx
+from fastapi import UploadFile
+
 from app.schemas.prayers import PrayerText
 from app.config import config
 
-async def transcribe_audio(audio_file: str) -> PrayerText:
+AUDIO_CHUNK_SIZE = 64 * 1024
+AUDIO_CONTENT_TYPES = {
+    ".m4a": "audio/mp4",
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+}
+# Sent with every pre-recorded transcription and part of the transcription cache key
+DEEPGRAM_OPTIONS = {"model": "nova-3", "smart_format": "true"}
+
+
+class AudioTooLargeError(Exception):
+    pass
+
+
+async def iter_upload(upload: UploadFile, max_bytes: int, chunk_size: int = AUDIO_CHUNK_SIZE) -> AsyncIterator[bytes]:
     """
-    Transcribe audio file using Deepgram's API
+    Yield an upload in fixed-size chunks, raising AudioTooLargeError as soon as
+    more than max_bytes have been read
+    """
+    total = 0
+    while chunk := await upload.read(chunk_size):
+        total += len(chunk)
+        if total > max_bytes:
+            raise AudioTooLargeError(f"Audio upload exceeds {max_bytes} bytes")
+        yield chunk
+
+
+async def hash_upload(upload: UploadFile, max_bytes: int) -> str:
+    """
+    SHA-256 of the upload together with the transcription options, computed in one
+    streaming pass. The upload is rewound afterwards so it can be streamed again.
+    """
+    digest = hashlib.sha256(json.dumps(DEEPGRAM_OPTIONS, sort_keys=True).encode())
+    async for chunk in iter_upload(upload, max_bytes):
+        digest.update(chunk)
+    await upload.seek(0)
+    return digest.hexdigest()
+
+
+_deepgram_client: Optional[httpx.AsyncClient] = None
+
+def get_deepgram_client() -> httpx.AsyncClient:
+    """Shared async client for Deepgram so connections are reused across requests"""
+    global _deepgram_client
+    if _deepgram_client is None:
+        _deepgram_client = httpx.AsyncClient(
+            base_url=config.DEEPGRAM_URL,
+            headers={"Authorization": f"Token {config.DEEPGRAM_API_KEY}"},
+            timeout=httpx.Timeout(config.DEEPGRAM_TIMEOUT_SECONDS, connect=10.0),
+        )
+    return _deepgram_client
+
+
+async def transcribe_audio(audio: AsyncIterator[bytes], content_type: str) -> PrayerText:
+    """
+    Transcribe audio using Deepgram's pre-recorded API.
+    The audio is streamed to Deepgram as it is read, so it is never held in
+    memory or written to disk by us.
     Returns a PrayerText object containing the transcribed text
     """
     try:
-        # Create Deepgram client
-        deepgram = DeepgramClient(config.DEEPGRAM_API_KEY)
-        
-        # Read the audio file
-        with open(audio_file, "rb") as file:
-            buffer_data = file.read()
-            
-        payload: FileSource = {
-            "buffer": buffer_data,
-        }
-        
-        # Configure Deepgram options
-        options = PrerecordedOptions(
-            model="nova-3",
-            smart_format=True,
+        response = await get_deepgram_client().post(
+            "/v1/listen",
+            params=DEEPGRAM_OPTIONS,
+            headers={"Content-Type": content_type},
+            content=audio,
         )
-        
-        # Get transcription
-        response = deepgram.listen.rest.v("1").transcribe_file(payload, options)
-        
-        # Extract transcribed text from response
-        print(response)
-        transcribed_text = response.results.channels[0].alternatives[0].transcript
-        
+        response.raise_for_status()
+        transcribed_text = response.json()["results"]["channels"][0]["alternatives"][0]["transcript"]
         return PrayerText(text=transcribed_text)
-        
+
+    except AudioTooLargeError:
+        raise
     except Exception as e:
         raise Exception(f"Transcription error: {str(e)}")
-    
 
 
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+def split_transcript(text: str, max_chars: int) -> List[str]:
+    """
+    Split a transcript into chunks of at most max_chars, breaking at paragraph
+    boundaries first, then sentence boundaries, and only splitting on whitespace
+    when a single sentence is longer than max_chars.
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    chunks = []
+    current = ""
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        for sentence in _SENTENCE_BREAK.split(paragraph.strip()):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(sentence[:cut])
+                sentence = sentence[cut:].strip()
+            if not sentence:
+                continue
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current} {sentence}" if current else sentence
+        # Prefer to close a chunk at a paragraph break once it is reasonably full
+        if len(current) >= max_chars // 2:
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
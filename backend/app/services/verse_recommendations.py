@@ -10,6 +10,7 @@ from langchain_core.documents import Document
 from app.db.database import get_vector_store
 from app.models import Prayer, PrayerVerseRecommendation
 from app.config.llm import oai_llm
+from app.config.rate_limiter import Priority, llm_priority
 from app.schemas.llm import Query, Relevance, Encouragement
 
 @asynccontextmanager
@@ -29,11 +30,12 @@ async def vectorize_docs(docs: list, tenant: str):
     """
     Creates a Weaviate vector store from a list of LangChain Documents.
     """
-    async with get_verse_store() as vdb:
-        await vdb.aadd_documents(docs, tenant=tenant)
+    with llm_priority(Priority.BACKGROUND):
+        async with get_verse_store() as vdb:
+            await vdb.aadd_documents(docs, tenant=tenant)
     return 
 
-def optimize_query(prayer: str) -> Query:
+async def optimize_query(prayer: str) -> Query:
     with_structure = oai_llm.with_structured_output(Query)
     prompt = """You are a Bible Verse Retrieval Assistant. Your task is to take a user's prayer and reframe it into a refined search query that captures the core theological themes and concepts expressed in the prayer, without including any extraneous words that might skew vector embeddings.
 
@@ -56,7 +58,7 @@ def optimize_query(prayer: str) -> Query:
 
     messages = [system_message] + [human_message]
 
-    return with_structure.invoke(messages)
+    return await with_structure.ainvoke(messages)
 
 async def verse_relevance(doc: Document, prayer: str):
     with_structure = oai_llm.with_structured_output(Relevance)
@@ -102,6 +104,11 @@ async def verse_relevance(doc: Document, prayer: str):
         raise
 
 async def generate_verse_recommendations(prayer: Prayer) -> List[PrayerVerseRecommendation]:
+    # Recommendations are background work and yield OpenAI quota to interactive parsing
+    with llm_priority(Priority.BACKGROUND):
+        return await _generate_verse_recommendations(prayer)
+
+async def _generate_verse_recommendations(prayer: Prayer) -> List[PrayerVerseRecommendation]:
 
     try:
         recommendations = []
@@ -110,7 +117,7 @@ async def generate_verse_recommendations(prayer: Prayer) -> List[PrayerVerseReco
         # Get the search results within the vector store context
         async with get_verse_store() as vdb:
             text = f"Prayer for {prayer.entity}\n{prayer.synopsis}\nDescription: {prayer.description}"
-            query_result = optimize_query(text)
+            query_result = await optimize_query(text)
             search_results = await vdb.asimilarity_search_with_score(query_result.verse_text, k=10, tenant="Bible")
         print(f"Search results: {search_results}")
         for doc, score in search_results:
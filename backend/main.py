@@ -1,13 +1,45 @@
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 
 from app.config.config import config
-from app.models import Base
 from app.api import api_router
+from app.config.apple_push import apns_client
+from app.config.llm import bind_event_loop
+from app.services.notification_outbox import notification_dispatcher
+from app.services.reminders import reminder_scheduler
+
+logging.basicConfig(format="%(levelname)s - %(name)s -  %(message)s", level=logging.WARNING)
+logging.getLogger("prayer-api").setLevel(logging.INFO)
+logger = logging.getLogger("prayer-api")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync embedding calls from vector store executor threads come back to this loop
+    bind_event_loop()
+    # One persistent HTTP/2 connection pool to APNs per worker
+    await apns_client.start()
+    if config.OUTBOX_ENABLED:
+        notification_dispatcher.start()
+    if config.REMINDERS_ENABLED:
+        reminder_scheduler.start()
+    yield
+    await reminder_scheduler.stop()
+    await notification_dispatcher.stop()
+    await apns_client.stop()
+
 
-app = FastAPI(title="Prayer API", redirect_slashes=False)
+app = FastAPI(title="Prayer API", redirect_slashes=False, lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -21,7 +53,30 @@ app.add_middleware(
 # Database setup
 DATABASE_URL = config.DATABASE_URL
 engine = create_engine(DATABASE_URL)
-Base.metadata.create_all(bind=engine)
+
+
+def create_schema():
+    """
+    Run the migrations on an empty database, so a local run needs no separate
+    'alembic upgrade head'. A database that already has tables is left alone and only
+    changed by running the migrations (docker-compose does that before starting the app).
+    """
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    alembic_config = AlembicConfig()
+    alembic_config.set_main_option("script_location", os.path.join(backend_dir, "alembic"))
+    alembic_config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+    script = ScriptDirectory.from_config(alembic_config)
+    with engine.connect() as connection:
+        empty = set(inspect(connection).get_table_names()) <= {"alembic_version"}
+        revision = MigrationContext.configure(connection).get_current_revision()
+    if empty:
+        command.upgrade(alembic_config, "head")
+    elif revision != script.get_current_head():
+        logger.warning(f"Database is at revision {revision}, "
+                       f"run 'alembic upgrade head' to reach {script.get_current_head()}")
+
+
+create_schema()
 
 # Import and include routers
 # from backend.api.routes import router
@@ -0,0 +1,99 @@
+"""
+Check that the hot service queries are planned as index scans.
+
+Runs EXPLAIN for each query against DATABASE_URL (with sequential scans disabled, so a
+small development database still shows which index the planner would pick) and fails
+if the expected index isn't used. Run after migrating:
+
+    cd backend && python -m test.explain_indexes
+"""
+import json
+import sys
+from datetime import datetime
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.config.config import config
+from app.models import (DeviceToken, NotificationOutbox, Prayer, PrayerNotification, PrayerVerseRecommendation,
+                        PrayerWall, PrayerWallInvite, Reaction, prayer_wall_prayers, prayer_wall_users)
+from app.services.pagination import encode_cursor, keyset_page
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+WALL_ID = "00000000-0000-0000-0000-000000000002"
+PRAYER_ID = "00000000-0000-0000-0000-000000000003"
+CURSOR = encode_cursor(datetime(2026, 1, 1), PRAYER_ID)
+
+# (description, statement, index the planner should use)
+CHECKS = [
+    ("walls a user belongs to",
+     select(prayer_wall_users.c.prayer_wall_id).where(prayer_wall_users.c.user_id == USER_ID),
+     "prayer_wall_users_pkey"),
+    ("members of a wall",
+     select(prayer_wall_users.c.user_id).where(prayer_wall_users.c.prayer_wall_id == WALL_ID),
+     "ix_prayer_wall_users_wall_user"),
+    ("walls a user owns",
+     select(PrayerWall.id).where(PrayerWall.owner_id == USER_ID),
+     "ix_prayer_walls_owner_id"),
+    ("page of a user's prayers",
+     keyset_page(select(Prayer).where(Prayer.user_id == USER_ID), Prayer.created_at, Prayer.id, 50, CURSOR),
+     "ix_prayers_user_created"),
+    ("page of a wall's prayers",
+     keyset_page(select(prayer_wall_prayers).where(prayer_wall_prayers.c.prayer_wall_id == WALL_ID),
+                 prayer_wall_prayers.c.created_at, prayer_wall_prayers.c.prayer_id, 50, CURSOR),
+     "ix_prayer_wall_prayers_wall_created"),
+    ("walls a prayer is shared on",
+     select(prayer_wall_prayers.c.prayer_wall_id).where(prayer_wall_prayers.c.prayer_id == PRAYER_ID),
+     "prayer_wall_prayers_pkey"),
+    ("verse recommendations of prayers",
+     select(PrayerVerseRecommendation).where(PrayerVerseRecommendation.prayer_id.in_([PRAYER_ID])),
+     "ix_prayer_verse_recommendations_prayer_id"),
+    ("active devices of users",
+     select(DeviceToken.id, DeviceToken.user_id, DeviceToken.device_token).where(
+         DeviceToken.user_id.in_([USER_ID]) & (DeviceToken.is_active == True)),
+     "ix_device_tokens_user_active"),
+    ("reactions on a shared prayer",
+     select(Reaction).where((Reaction.prayer_id == PRAYER_ID) & (Reaction.prayer_wall_id == WALL_ID)),
+     "ix_reactions_prayer_wall"),
+    ("invites of a wall",
+     select(PrayerWallInvite).where(PrayerWallInvite.wall_id == WALL_ID),
+     "ix_prayer_wall_invites_wall_id"),
+    ("due reminders",
+     select(PrayerNotification.id).where(
+         ~PrayerNotification.is_sent & (PrayerNotification.scheduled_time <= datetime(2026, 1, 1))
+     ).order_by(PrayerNotification.scheduled_time).limit(100),
+     "ix_prayer_notifications_due"),
+    ("due outbox notifications",
+     select(NotificationOutbox).where(
+         (NotificationOutbox.status == "pending") & (NotificationOutbox.next_attempt_at <= datetime(2026, 1, 1))
+     ).order_by(NotificationOutbox.next_attempt_at).limit(100),
+     "ix_notification_outbox_due"),
+]
+
+
+def indexes_used(plan: dict) -> set:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= indexes_used(child)
+    return names
+
+
+def main() -> int:
+    engine = create_engine(config.DATABASE_URL)
+    failures = 0
+    with engine.connect() as connection:
+        connection.execute(text("SET enable_seqscan = off"))
+        for description, stmt, index in CHECKS:
+            sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+            plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            used = indexes_used(plan[0]["Plan"])
+            ok = index in used
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {description:<36} expected {index}, used {', '.join(sorted(used)) or 'no index'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
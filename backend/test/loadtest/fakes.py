@@ -0,0 +1,463 @@
+"""
+Local stand-ins for the paid services the API talks to, for load testing:
+an OpenAI-compatible chat/embeddings server, a Deepgram transcription stub (pre-recorded
+and live), an in-process live transcriber and an APNs stub that speaks HTTP/2 (h2c prior knowledge) and HTTP/1.1.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+
+import h2.config
+import h2.connection
+import h2.events
+import h11
+import numpy as np
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+
+EMBEDDING_DIMENSION = 1536
+
+
+@dataclass
+class LatencyModel:
+    """Log-normal latency described by its median and p95, in seconds"""
+    median: float
+    p95: float
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        sigma = math.log(max(self.p95, self.median) / self.median) / 1.645
+        return random.lognormvariate(math.log(self.median), sigma)
+
+    @classmethod
+    def parse(cls, value: str) -> "LatencyModel":
+        """Parse 'median,p95' (e.g. '0.8,3.0')"""
+        median, p95 = (float(part) for part in value.split(","))
+        return cls(median, p95)
+
+
+@dataclass
+class StubStats:
+    requests: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    connections: int = 0
+
+    def snapshot(self) -> dict:
+        return {"requests": dict(self.requests), "errors": dict(self.errors), "connections": self.connections}
+
+
+def fake_embedding(text, dimension: int = EMBEDDING_DIMENSION) -> list:
+    """Deterministic unit vector for a text (or token list), so similar inputs are stable across runs"""
+    seed = int.from_bytes(hashlib.sha256(repr(text).encode()).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+WORDS = ["grace", "hope", "healing", "family", "peace", "strength", "guidance", "job", "provision",
+         "faith", "comfort", "rest", "joy", "patience", "wisdom", "mercy", "protection", "friend"]
+
+
+def fake_from_schema(schema: dict, defs: dict = None):
+    """Build a value that satisfies a (pydantic-generated) JSON schema"""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return fake_from_schema(defs[schema["$ref"].split("/")[-1]], defs)
+    if "allOf" in schema:
+        return fake_from_schema(schema["allOf"][0], defs)
+    if "anyOf" in schema:
+        return fake_from_schema(schema["anyOf"][0], defs)
+    if "enum" in schema:
+        return random.choice(schema["enum"])
+    kind = schema.get("type", "object")
+    if kind == "object":
+        return {name: fake_from_schema(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [fake_from_schema(schema.get("items", {}), defs) for _ in range(random.randint(1, 3))]
+    if kind == "boolean":
+        return random.random() < 0.5
+    if kind == "integer":
+        return random.randint(1, 10)
+    if kind == "number":
+        return round(random.random(), 3)
+    return " ".join(random.choices(WORDS, k=random.randint(3, 12)))
+
+
+def _structured_target(body: dict):
+    """Return (name, schema, via_tool) for the structured output the request asks for"""
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        json_schema = response_format["json_schema"]
+        return json_schema.get("name", "response"), json_schema.get("schema", {}), False
+    tools = body.get("tools") or []
+    if tools:
+        tool_choice = body.get("tool_choice")
+        chosen = tools[0]["function"]
+        if isinstance(tool_choice, dict):
+            name = tool_choice.get("function", {}).get("name")
+            chosen = next((tool["function"] for tool in tools if tool["function"]["name"] == name), chosen)
+        return chosen["name"], chosen.get("parameters", {}), True
+    return None, None, False
+
+
+def create_openai_app(latency: LatencyModel, error_rate: float = 0.0, stats: StubStats = None) -> FastAPI:
+    """OpenAI-compatible /v1/chat/completions and /v1/embeddings with configurable latency and errors"""
+    app = FastAPI(title="Fake OpenAI")
+    stats = stats or StubStats()
+
+    def injected_error(route: str):
+        if random.random() < error_rate:
+            stats.errors[route] += 1
+            status = random.choice([429, 500])
+            return JSONResponse({"error": {"message": "injected failure", "type": "server_error"}}, status_code=status)
+        return None
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats.requests["chat"] += 1
+        await asyncio.sleep(latency.sample())
+        if (error := injected_error("chat")) is not None:
+            return error
+
+        name, schema, via_tool = _structured_target(body)
+        arguments = json.dumps(fake_from_schema(schema)) if schema is not None else "Amen."
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        usage = {"prompt_tokens": 100, "completion_tokens": len(arguments) // 4, "total_tokens": 100 + len(arguments) // 4}
+
+        if body.get("stream"):
+            return StreamingResponse(
+                _stream_chunks(completion_id, created, body["model"], name, arguments, via_tool),
+                media_type="text/event-stream",
+            )
+
+        message = {"role": "assistant", "content": None if via_tool else arguments, "refusal": None}
+        if via_tool:
+            message["tool_calls"] = [{
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": name, "arguments": arguments},
+            }]
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": body["model"],
+            "choices": [{"index": 0, "message": message, "logprobs": None,
+                         "finish_reason": "tool_calls" if via_tool else "stop"}],
+            "usage": usage,
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        stats.requests["embeddings"] += 1
+        await asyncio.sleep(latency.sample() / 4)
+        if (error := injected_error("embeddings")) is not None:
+            return error
+
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        dimension = body.get("dimensions") or EMBEDDING_DIMENSION
+        data = []
+        for index, item in enumerate(inputs):
+            vector = fake_embedding(item, dimension)
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode()
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        return {"object": "list", "data": data, "model": body["model"],
+                "usage": {"prompt_tokens": len(inputs) * 50, "total_tokens": len(inputs) * 50}}
+
+    return app
+
+
+async def _stream_chunks(completion_id, created, model, name, arguments, via_tool):
+    def chunk(delta, finish_reason=None):
+        payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                   "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish_reason}]}
+        return f"data: {json.dumps(payload)}\n\n"
+
+    if via_tool:
+        yield chunk({"role": "assistant", "content": None, "tool_calls": [{
+            "index": 0, "id": f"call_{uuid.uuid4().hex[:24]}", "type": "function",
+            "function": {"name": name, "arguments": ""}}]})
+    else:
+        yield chunk({"role": "assistant", "content": ""})
+    for start in range(0, len(arguments), 24):
+        piece = arguments[start:start + 24]
+        if via_tool:
+            yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": piece}}]})
+        else:
+            yield chunk({"content": piece})
+        await asyncio.sleep(0.005)
+    yield chunk({}, "tool_calls" if via_tool else "stop")
+    yield "data: [DONE]\n\n"
+
+
+SAMPLE_TRANSCRIPTS = [
+    "Lord, please heal my mother who is in the hospital. Thank you for my new job and for providing for our family.",
+    "Father, give me patience with my kids this week. I pray for my friend John who is looking for work.",
+    "God, I praise you for your faithfulness. Please bring peace to my brother's marriage and guide my exams.",
+]
+
+
+def create_deepgram_app(latency: LatencyModel, stats: StubStats = None) -> FastAPI:
+    """Deepgram pre-recorded /v1/listen stub returning one of a few sample prayers"""
+    app = FastAPI(title="Fake Deepgram")
+    stats = stats or StubStats()
+
+    @app.post("/v1/listen")
+    async def listen(request: Request):
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        stats.requests["listen"] += 1
+        await asyncio.sleep(latency.sample())
+        transcript = random.choice(SAMPLE_TRANSCRIPTS)
+        return {
+            "metadata": {
+                "transaction_key": "deprecated",
+                "request_id": str(uuid.uuid4()),
+                "sha256": "",
+                "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "duration": round(size / 32000, 2),
+                "channels": 1,
+                "models": [request.query_params.get("model", "nova-3")],
+                "model_info": {},
+            },
+            "results": {
+                "channels": [{
+                    "alternatives": [{"transcript": transcript, "confidence": 0.99, "words": []}]
+                }]
+            },
+        }
+
+    @app.websocket("/v1/listen")
+    async def listen_live(websocket: WebSocket):
+        """Streaming stub: a few words of interim results per audio frame, finals every few frames"""
+        await websocket.accept()
+        stats.requests["listen_live"] += 1
+        words = random.choice(SAMPLE_TRANSCRIPTS).split()
+        finalized = spoken = 0
+
+        async def result(is_final: bool):
+            await websocket.send_json({
+                "type": "Results",
+                "channel": {"alternatives": [{"transcript": " ".join(words[finalized:spoken]), "confidence": 0.9}]},
+                "is_final": is_final,
+                "speech_final": is_final,
+            })
+
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("bytes"):
+                    spoken = min(len(words), spoken + 3)
+                    if spoken - finalized >= 9:
+                        await result(True)
+                        finalized = spoken
+                    elif spoken > finalized:
+                        await result(False)
+                elif message.get("text") and json.loads(message["text"]).get("type") == "CloseStream":
+                    await asyncio.sleep(latency.sample())
+                    spoken = len(words)
+                    await result(True)
+                    await websocket.send_json({"type": "Metadata", "request_id": str(uuid.uuid4())})
+                    await websocket.close()
+                    return
+        except WebSocketDisconnect:
+            pass
+
+    return app
+
+
+class FakeLiveTranscriber:
+    """
+    In-process stand-in for app.services.live_transcription.DeepgramLiveTranscriber.
+    Install it with app.dependency_overrides[get_live_transcriber] = lambda: FakeLiveTranscriber().
+    """
+
+    def __init__(self, transcript: str = None, words_per_frame: int = 3):
+        self.transcript = transcript or random.choice(SAMPLE_TRANSCRIPTS)
+        self.words_per_frame = words_per_frame
+
+    async def open(self, encoding=None, sample_rate=None):
+        from app.services.live_transcription import LiveTranscriptionSession, TranscriptSegment
+
+        transcriber = self
+
+        class Session(LiveTranscriptionSession):
+            def __init__(self):
+                self.words = transcriber.transcript.split()
+                self.spoken = 0
+                self.queue = asyncio.Queue()
+
+            async def send(self, audio: bytes):
+                self.spoken = min(len(self.words), self.spoken + transcriber.words_per_frame)
+                await self.queue.put(TranscriptSegment(" ".join(self.words[:self.spoken]), is_final=False))
+
+            async def finish(self):
+                await self.queue.put(TranscriptSegment(" ".join(self.words), is_final=True))
+                await self.queue.put(None)
+
+            async def __aiter__(self):
+                while (segment := await self.queue.get()) is not None:
+                    yield segment
+
+        return Session()
+
+
+class APNsStub:
+    """
+    APNs provider API stub. Accepts HTTP/2 with prior knowledge (as the production
+    client uses over cleartext) and plain HTTP/1.1. Tokens listed in bad_tokens, or a
+    random bad_token_rate share of pushes, get 400 BadDeviceToken; tokens listed in
+    unregistered_tokens get 410 Unregistered; provider tokens in expired_provider_tokens
+    get 403 ExpiredProviderToken; a connection is sent GOAWAY
+    after goaway_after streams when that is set.
+    """
+
+    HTTP2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+
+    def __init__(self, latency: LatencyModel, bad_token_rate: float = 0.0, goaway_after: int = 0,
+                 bad_tokens: set = None, expired_provider_tokens: set = None, unregistered_tokens: set = None):
+        self.latency = latency
+        self.bad_token_rate = bad_token_rate
+        self.goaway_after = goaway_after
+        self.bad_tokens = bad_tokens or set()
+        self.expired_provider_tokens = expired_provider_tokens or set()
+        self.unregistered_tokens = unregistered_tokens or set()
+        self.stats = StubStats()
+        self._server = None
+
+    async def start(self, host: str, port: int):
+        self._server = await asyncio.start_server(self._handle, host, port)
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _decide(self, path: str, headers: dict):
+        await asyncio.sleep(self.latency.sample())
+        device_token = path.rsplit("/", 1)[-1]
+        self.stats.requests["push"] += 1
+        if not headers.get("authorization", "").lower().startswith("bearer "):
+            self.stats.errors["MissingProviderToken"] += 1
+            return 403, {"reason": "MissingProviderToken"}
+        if headers["authorization"][len("bearer "):] in self.expired_provider_tokens:
+            self.stats.errors["ExpiredProviderToken"] += 1
+            return 403, {"reason": "ExpiredProviderToken"}
+        if device_token in self.bad_tokens or random.random() < self.bad_token_rate:
+            self.stats.errors["BadDeviceToken"] += 1
+            return 400, {"reason": "BadDeviceToken"}
+        if device_token in self.unregistered_tokens:
+            self.stats.errors["Unregistered"] += 1
+            return 410, {"reason": "Unregistered", "timestamp": int(time.time() * 1000)}
+        return 200, None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats.connections += 1
+        try:
+            preface = await reader.readexactly(len(self.HTTP2_PREFACE))
+            if preface == self.HTTP2_PREFACE:
+                await self._serve_http2(preface, reader, writer)
+            else:
+                await self._serve_http1(preface, reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_http2(self, preface, reader, writer):
+        conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        conn.receive_data(preface)
+        writer.write(conn.data_to_send())
+        requests = {}
+        served = 0
+        last_accepted = 0
+        tasks = set()
+
+        async def respond(stream_id, request):
+            status, body = await self._decide(request["path"], request["headers"])
+            apns_id = str(uuid.uuid4())
+            if body is None:
+                conn.send_headers(stream_id, [(":status", str(status)), ("apns-id", apns_id)], end_stream=True)
+            else:
+                data = json.dumps(body).encode()
+                conn.send_headers(stream_id, [(":status", str(status)), ("apns-id", apns_id),
+                                              ("content-type", "application/json"),
+                                              ("content-length", str(len(data)))])
+                conn.send_data(stream_id, data, end_stream=True)
+            writer.write(conn.data_to_send())
+
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    headers = {k.decode() if isinstance(k, bytes) else k: v.decode() if isinstance(v, bytes) else v
+                               for k, v in event.headers}
+                    requests[event.stream_id] = {"path": headers.get(":path", ""), "headers": headers}
+                elif isinstance(event, h2.events.DataReceived):
+                    conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                elif isinstance(event, h2.events.StreamEnded):
+                    served += 1
+                    last_accepted = max(last_accepted, event.stream_id)
+                    task = asyncio.create_task(respond(event.stream_id, requests.pop(event.stream_id)))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    return
+            writer.write(conn.data_to_send())
+            await writer.drain()
+            if self.goaway_after and served >= self.goaway_after:
+                # Answer every fully received stream; later ones were never processed and may be retried
+                await asyncio.gather(*tasks)
+                conn.close_connection(last_stream_id=last_accepted)
+                writer.write(conn.data_to_send())
+                await writer.drain()
+                return
+
+    async def _serve_http1(self, preface, reader, writer):
+        conn = h11.Connection(h11.SERVER)
+        conn.receive_data(preface)
+        request = None
+        while True:
+            event = conn.next_event()
+            if event is h11.NEED_DATA:
+                data = await reader.read(65536)
+                conn.receive_data(data)
+                if not data:
+                    return
+                continue
+            if isinstance(event, h11.Request):
+                request = event
+            elif isinstance(event, h11.EndOfMessage):
+                headers = {k.decode().lower(): v.decode() for k, v in request.headers}
+                status, body = await self._decide(request.target.decode(), headers)
+                data = json.dumps(body).encode() if body else b""
+                response_headers = [("apns-id", str(uuid.uuid4())), ("content-length", str(len(data)))]
+                if data:
+                    response_headers.append(("content-type", "application/json"))
+                writer.write(conn.send(h11.Response(status_code=status, headers=response_headers)))
+                if data:
+                    writer.write(conn.send(h11.Data(data=data)))
+                writer.write(conn.send(h11.EndOfMessage()))
+                await writer.drain()
+                if conn.our_state is h11.MUST_CLOSE:
+                    return
+                conn.start_next_cycle()
+            elif isinstance(event, h11.ConnectionClosed):
+                return
@@ -0,0 +1,225 @@
+"""
+Offline load test for the Prayer API.
+
+Starts local stand-ins for OpenAI, Deepgram and APNs, an in-memory vector store seeded
+with synthetic verses, and the real FastAPI app (as a uvicorn subprocess) pointed at them.
+Then drives user scenarios and reports throughput, latency percentiles and error rates
+per endpoint. Postgres is still real: DATABASE_URL and ASYNC_DATABASE_URL must point at
+a disposable database (e.g. the docker-compose `db` service).
+
+    cd backend && python -m test.loadtest.run --users 50 --duration 120 --workers 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROJECT_ROOT = os.path.dirname(BACKEND_DIR)
+
+BOOKS = [("GEN", "Genesis"), ("PSA", "Psalm"), ("PRO", "Proverbs"), ("ISA", "Isaiah"),
+         ("MAT", "Matthew"), ("JHN", "John"), ("ROM", "Romans"), ("PHP", "Philippians")]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline load test for the Prayer API")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run scenarios")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app")
+    parser.add_argument("--scenarios", default="audio_journey,text_preview,browse")
+    parser.add_argument("--think-time", type=float, default=0.5, help="max pause between steps, seconds")
+    parser.add_argument("--openai-latency", default="0.8,3.0", help="median,p95 seconds")
+    parser.add_argument("--openai-error-rate", type=float, default=0.0)
+    parser.add_argument("--deepgram-latency", default="1.0,2.5", help="median,p95 seconds")
+    parser.add_argument("--apns-latency", default="0.05,0.2", help="median,p95 seconds")
+    parser.add_argument("--apns-bad-token-rate", type=float, default=0.0)
+    parser.add_argument("--apns-goaway-after", type=int, default=0, help="send GOAWAY after N streams")
+    parser.add_argument("--verses", type=int, default=500, help="synthetic Bible chunks to seed")
+    parser.add_argument("--json", help="also write the report to this file")
+    return parser.parse_args()
+
+
+def stub_environment(ports: dict, artifact_dir: str) -> dict:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    apns_key = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    return {
+        "OPENAI_API_KEY": "loadtest",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{ports['openai']}/v1",
+        "OPENAI_EMBEDDING_CHECK_CTX_LENGTH": "false",
+        "DEEPGRAM_API_KEY": "loadtest",
+        "DEEPGRAM_URL": f"http://127.0.0.1:{ports['deepgram']}",
+        "APPLE_PUSH_URL": f"http://127.0.0.1:{ports['apns']}",
+        "APPLE_TEAM_ID": "LOADTEST01",
+        "APPLE_KEY_ID": "LOADTEST01",
+        "APPLE_BUNDLE_ID": "dhongz.Prayer",
+        "APPLE_PRIVATE_KEY": apns_key,
+        "VECTOR_STORE_BACKEND": "memory",
+        "EMBEDDING_ARTIFACT_DIR": artifact_dir,
+        "JWT_SECRET": os.environ.get("JWT_SECRET") or secrets.token_urlsafe(32),
+        "PYTHONPATH": os.pathsep.join([BACKEND_DIR, PROJECT_ROOT]),
+    }
+
+
+def write_bible_artifact(artifact_dir: str, count: int):
+    from langchain_core.documents import Document
+    from app.services.embedding_artifact import write_embedding_artifact
+    from .fakes import fake_embedding, WORDS
+
+    docs = []
+    for i in range(count):
+        book_id, book_name = BOOKS[i % len(BOOKS)]
+        verse_start = i // len(BOOKS) + 1
+        docs.append(Document(
+            page_content=" ".join(random.choices(WORDS, k=25)),
+            metadata={"book_id": book_id, "book_name": book_name, "chapter_number": 1,
+                      "verse_number_start": verse_start, "verse_number_end": verse_start + 2,
+                      "translation_id": "BSB"},
+        ))
+    vectors = [fake_embedding(doc.page_content) for doc in docs]
+    write_embedding_artifact(docs, vectors, "text-embedding-3-small", artifact_dir)
+
+
+async def start_stubs(args, ports: dict):
+    import uvicorn
+    from .fakes import APNsStub, LatencyModel, StubStats, create_deepgram_app, create_openai_app
+
+    stats = {"openai": StubStats(), "deepgram": StubStats()}
+    servers = [
+        uvicorn.Server(uvicorn.Config(
+            create_openai_app(LatencyModel.parse(args.openai_latency), args.openai_error_rate, stats["openai"]),
+            host="127.0.0.1", port=ports["openai"], log_level="warning")),
+        uvicorn.Server(uvicorn.Config(
+            create_deepgram_app(LatencyModel.parse(args.deepgram_latency), stats["deepgram"]),
+            host="127.0.0.1", port=ports["deepgram"], log_level="warning")),
+    ]
+    tasks = [asyncio.create_task(server.serve()) for server in servers]
+    apns = APNsStub(LatencyModel.parse(args.apns_latency), args.apns_bad_token_rate, args.apns_goaway_after)
+    await apns.start("127.0.0.1", ports["apns"])
+    while not all(server.started for server in servers):
+        await asyncio.sleep(0.05)
+    stats["apns"] = apns.stats
+    return servers, tasks, apns, stats
+
+
+async def wait_for_app(base_url: str, process: subprocess.Popen, timeout: float = 60):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"App exited with code {process.returncode} during startup")
+            try:
+                # Metrics need a token, but any answer at all means the app is serving
+                await client.get("/api/v1/metrics/llm")
+                return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError("App did not start in time")
+
+
+async def create_users(count: int) -> list:
+    from app.db.database import AsyncSessionLocal
+    from app.models import User
+    from app.services.auth import generate_access_token
+    from .scenarios import VirtualUser
+
+    run_id = secrets.token_hex(4)
+    users = [User(email=f"loadtest-{run_id}-{i}@example.com", provider="loadtest",
+                  provider_id=f"loadtest-{run_id}-{i}") for i in range(count)]
+    async with AsyncSessionLocal() as db:
+        db.add_all(users)
+        await db.commit()
+    return [VirtualUser(user_id=user.id, token=generate_access_token(user.id).access_token) for user in users]
+
+
+async def run_load(base_url: str, users: list, args) -> "Recorder":
+    import httpx
+    from .scenarios import Recorder, join_wall, pick_scenario, setup_user
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        setup = Recorder()
+        await asyncio.gather(*(setup_user(client, setup, user) for user in users))
+        # Pair users up so every wall has a member and joins exercise push notifications
+        await asyncio.gather(*(join_wall(client, setup, users[i - 1], users[i]) for i in range(1, len(users))))
+        print_report("Setup", setup.report())
+
+        recorder = Recorder()
+        deadline = time.monotonic() + args.duration
+
+        async def virtual_user(user):
+            while time.monotonic() < deadline:
+                await pick_scenario(names)(client, recorder, user, args.think_time)
+
+        await asyncio.gather(*(virtual_user(user) for user in users))
+        recorder.finished = time.monotonic()
+        return recorder
+
+
+def print_report(title: str, rows: list):
+    print(f"\n{title}")
+    print(f"{'endpoint':<48} {'count':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for row in rows:
+        print(f"{row['endpoint']:<48} {row['count']:>7} {row['throughput_rps']:>8.2f} {row['p50_ms']:>9.1f} "
+              f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['error_rate']:>7.1%}")
+
+
+async def main():
+    args = parse_args()
+    ports = {name: free_port() for name in ("openai", "deepgram", "apns", "app")}
+    with tempfile.TemporaryDirectory(prefix="prayer-loadtest-") as artifact_dir:
+        # The app config is read at import time, so the environment must be in place first
+        environment = stub_environment(ports, artifact_dir)
+        os.environ.update(environment)
+        sys.path.insert(0, PROJECT_ROOT)
+        write_bible_artifact(artifact_dir, args.verses)
+
+        servers, tasks, apns, stats = await start_stubs(args, ports)
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(ports["app"]),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env={**os.environ, **environment},
+        )
+        base_url = f"http://127.0.0.1:{ports['app']}"
+        try:
+            await wait_for_app(base_url, process)
+            users = await create_users(args.users)
+            recorder = await run_load(base_url, users, args)
+            rows = recorder.report()
+            print_report(f"Load: {args.users} users for {args.duration:.0f}s", rows)
+            stub_stats = {name: stub.snapshot() for name, stub in stats.items()}
+            print("\nStub traffic:", json.dumps(stub_stats, indent=2))
+            if args.json:
+                with open(args.json, "w") as f:
+                    json.dump({"args": vars(args), "endpoints": rows, "stubs": stub_stats}, f, indent=2)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+            for server in servers:
+                server.should_exit = True
+            await asyncio.gather(*tasks)
+            await apns.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import httpx
+
+API = "/api/v1"
+
+
+@dataclass
+class VirtualUser:
+    user_id: str
+    token: str
+    wall_id: str = None
+    device_token: str = field(default_factory=lambda: os.urandom(32).hex())
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+class Recorder:
+    """Collects latency and status per endpoint (keyed by route template, not concrete URL)"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.started = time.monotonic()
+        self.finished = None
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        started = time.monotonic()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.samples[name].append(time.monotonic() - started)
+            self.errors[name] += 1
+            return None
+        self.samples[name].append(time.monotonic() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response
+
+    def report(self) -> list:
+        elapsed = (self.finished or time.monotonic()) - self.started
+        rows = []
+        for name, latencies in sorted(self.samples.items()):
+            ordered = sorted(latencies)
+            rows.append({
+                "endpoint": name,
+                "count": len(ordered),
+                "throughput_rps": len(ordered) / elapsed if elapsed else 0.0,
+                "p50_ms": percentile(ordered, 50) * 1000,
+                "p95_ms": percentile(ordered, 95) * 1000,
+                "p99_ms": percentile(ordered, 99) * 1000,
+                "error_rate": self.errors[name] / len(ordered),
+            })
+        return rows
+
+
+def percentile(ordered: list, pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def fake_audio(min_bytes: int = 32_000, max_bytes: int = 320_000) -> bytes:
+    """A WAV-looking upload between roughly 1 and 10 seconds of 16 kHz mono audio"""
+    return b"RIFF" + os.urandom(random.randint(min_bytes, max_bytes))
+
+
+async def setup_user(client: httpx.AsyncClient, recorder: Recorder, user: VirtualUser):
+    await recorder.request(client, "POST /notifications/register-device", "POST",
+                           f"{API}/notifications/register-device",
+                           json={"device_token": user.device_token}, headers=user.headers)
+    response = await recorder.request(client, "POST /prayer-walls", "POST", f"{API}/prayer-walls",
+                                      json={"title": f"Wall {user.user_id[:8]}", "description": "Load test wall",
+                                            "is_public": False},
+                                      headers=user.headers)
+    if response is not None:
+        user.wall_id = response.json()["id"]
+
+
+async def join_wall(client: httpx.AsyncClient, recorder: Recorder, owner: VirtualUser, member: VirtualUser):
+    """Member joins the owner's wall through an invite, which pushes a notification to the owner"""
+    if owner.wall_id is None:
+        return
+    response = await recorder.request(client, "POST /prayer-walls/{wall_id}/generate-invite", "POST",
+                                      f"{API}/prayer-walls/{owner.wall_id}/generate-invite", headers=owner.headers)
+    if response is None:
+        return
+    invite_code = response.json()["invite_code"]
+    await recorder.request(client, "POST /prayer-walls/join/{invite_code}", "POST",
+                           f"{API}/prayer-walls/join/{invite_code}", headers=member.headers)
+
+
+async def audio_journey(client: httpx.AsyncClient, recorder: Recorder, user: VirtualUser, think_time: float):
+    """Record a prayer, save what was parsed, share it to a wall and browse the wall"""
+    response = await recorder.request(client, "POST /prayers/process-audio", "POST", f"{API}/prayers/process-audio",
+                                      files={"prayer_audio": ("prayer.wav", fake_audio(), "audio/wav")},
+                                      headers=user.headers)
+    if response is None:
+        return
+    parsed_prayers = response.json()
+    await think(think_time)
+
+    response = await recorder.request(client, "POST /prayers/bulk-create-prayers", "POST",
+                                      f"{API}/prayers/bulk-create-prayers", json=parsed_prayers, headers=user.headers)
+    if response is None or not parsed_prayers:
+        return
+    await think(think_time)
+
+    if user.wall_id:
+        await recorder.request(client, "POST /prayers/{prayer_id}/walls", "POST",
+                               f"{API}/prayers/{parsed_prayers[0]['id']}/walls",
+                               json=[user.wall_id], headers=user.headers)
+        await think(think_time)
+    await browse(client, recorder, user, think_time)
+
+
+async def text_preview(client: httpx.AsyncClient, recorder: Recorder, user: VirtualUser, think_time: float):
+    """Type a prayer and preview how it is parsed without saving it"""
+    text = random.choice([
+        "Please heal my dad's back and help my sister find a job.",
+        "Thank you Lord for my church family. Give me wisdom at work and peace at home.",
+        "I pray for my neighbor who lost her husband, and for rain for the farmers.",
+    ])
+    await recorder.request(client, "POST /prayers/process-text", "POST", f"{API}/prayers/process-text",
+                           json={"text": text}, headers=user.headers)
+
+
+async def browse(client: httpx.AsyncClient, recorder: Recorder, user: VirtualUser, think_time: float):
+    """Open the app: list prayers and walls, then open the user's wall"""
+    await recorder.request(client, "GET /prayers", "GET", f"{API}/prayers", headers=user.headers)
+    await recorder.request(client, "GET /prayer-walls", "GET", f"{API}/prayer-walls", headers=user.headers)
+    if user.wall_id:
+        await think(think_time)
+        await recorder.request(client, "GET /prayer-walls/{wall_id}/prayers", "GET",
+                               f"{API}/prayer-walls/{user.wall_id}/prayers", headers=user.headers)
+
+
+SCENARIOS = {
+    "audio_journey": (audio_journey, 0.5),
+    "text_preview": (text_preview, 0.3),
+    "browse": (browse, 0.2),
+}
+
+
+def pick_scenario(names: list):
+    weights = [SCENARIOS[name][1] for name in names]
+    return SCENARIOS[random.choices(names, weights=weights)[0]][0]
+
+
+async def think(seconds: float):
+    if seconds > 0:
+        await asyncio.sleep(random.uniform(0, seconds))
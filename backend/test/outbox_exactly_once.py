@@ -0,0 +1,120 @@
+"""
+Check that the notification outbox delivers every row exactly once when several
+dispatchers run against it, including coalesced events that come due while other
+events of the same user are still being sent. Pushes go to a local APNs stub with
+enough latency that each dispatcher's claims are in flight while the others poll.
+
+    cd backend && python -m test.outbox_exactly_once
+"""
+import asyncio
+import os
+import secrets
+import sys
+from collections import Counter
+from datetime import datetime, timedelta
+
+from test.loadtest.run import free_port, stub_environment
+
+USERS = 20
+EVENT_ROUNDS = 12
+EVENT_INTERVAL_SECONDS = 0.25
+DISPATCHERS = 8
+TIMEOUT_SECONDS = 60
+
+PORTS = {"openai": free_port(), "deepgram": free_port(), "apns": free_port()}
+# The app config is read at import time, so the environment must be in place first
+for name, value in stub_environment(PORTS, "/tmp").items():
+    if name.startswith("APPLE_"):
+        os.environ[name] = value
+
+from sqlalchemy import select  # noqa: E402
+
+from app.config.apple_push import apns_client  # noqa: E402
+from app.db.database import AsyncSessionLocal  # noqa: E402
+from app.models import DeviceToken, NotificationOutbox  # noqa: E402
+from app.services.notification_outbox import NotificationDispatcher, enqueue_notification  # noqa: E402
+from test.loadtest.fakes import APNsStub, LatencyModel  # noqa: E402
+from test.loadtest.run import create_users  # noqa: E402
+
+
+class RecordingDispatcher(NotificationDispatcher):
+    """Remembers which outbox rows went out in each of its pushes"""
+
+    def __init__(self, delivered: Counter, **kwargs):
+        super().__init__(**kwargs)
+        self.delivered = delivered
+
+    def _deliveries(self, entries):
+        deliveries = super()._deliveries(entries)
+        for delivery in deliveries:
+            self.delivered.update(entry.id for entry in delivery.entries)
+        return deliveries
+
+
+async def enqueue_events(user_ids, ids: list):
+    """
+    Every user gets a plain notification and then a steady stream of coalescable events,
+    each due at once, so new events keep coming due while earlier ones are being sent
+    """
+    for round in range(EVENT_ROUNDS):
+        async with AsyncSessionLocal() as db:
+            entries = []
+            for user_id in user_ids:
+                if round == 0:
+                    entries.append(enqueue_notification(db, user_id, "Plain", "plain notification"))
+                entry = enqueue_notification(db, user_id, "Wall", f"event {round}", event_type="wall_share",
+                                             group_key="wall:check", group_label="Check Wall")
+                entry.next_attempt_at = datetime.now()
+                entries.append(entry)
+            await db.commit()
+            ids.extend(entry.id for entry in entries)
+        await asyncio.sleep(EVENT_INTERVAL_SECONDS)
+
+
+async def pending(ids) -> int:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(NotificationOutbox.id).where(NotificationOutbox.id.in_(ids) & (NotificationOutbox.status == "pending"))
+        )
+        return len(result.all())
+
+
+async def run_dispatcher(dispatcher: NotificationDispatcher, stop: asyncio.Event):
+    while not stop.is_set():
+        if not await dispatcher.dispatch_once():
+            await asyncio.sleep(0.05)
+
+
+async def main() -> int:
+    apns = APNsStub(LatencyModel(0.3, 0.8))
+    await apns.start("127.0.0.1", PORTS["apns"])
+
+    users = await create_users(USERS)
+    async with AsyncSessionLocal() as db:
+        db.add_all([DeviceToken(user_id=user.user_id, device_token=secrets.token_hex(32)) for user in users])
+        await db.commit()
+
+    await apns_client.start()
+    delivered = Counter()
+    stop = asyncio.Event()
+    dispatchers = [RecordingDispatcher(delivered, batch_size=2, lease_seconds=30) for _ in range(DISPATCHERS)]
+    tasks = [asyncio.create_task(run_dispatcher(dispatcher, stop)) for dispatcher in dispatchers]
+    ids = []
+    await enqueue_events([user.user_id for user in users], ids)
+    deadline = asyncio.get_running_loop().time() + TIMEOUT_SECONDS
+    while await pending(ids) and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.2)
+    stop.set()
+    await asyncio.gather(*tasks)
+    await apns_client.stop()
+    await apns.stop()
+
+    missing = [id for id in ids if delivered[id] == 0]
+    duplicated = [id for id in ids if delivered[id] > 1]
+    print(f"{len(ids)} rows, {apns.stats.requests['push']} pushes, "
+          f"{len(missing)} never delivered, {len(duplicated)} delivered more than once")
+    return 1 if missing or duplicated else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,88 @@
+"""
+Check that listing prayer walls costs one query however many walls and members there
+are. Creates a few users sharing several walls and a prayer shared on all of them, then
+counts the statements sent to DATABASE_URL while each wall listing runs:
+
+    cd backend && python -m test.query_count_walls
+"""
+import asyncio
+import secrets
+import sys
+from contextlib import contextmanager
+
+from sqlalchemy import event, insert
+
+from app.db.database import AsyncSessionLocal, engine
+from app.models import Prayer, PrayerType, PrayerWall, User, prayer_wall_prayers, prayer_wall_users
+from app.services.prayer_walls import process_get_prayer_walls as get_user_walls
+from app.services.prayers import process_get_prayer_walls as get_prayer_walls
+
+USERS = 5
+WALLS = 4
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+async def create_walls():
+    """Every user is on every wall, and the owner's prayer is shared on all of them"""
+    run_id = secrets.token_hex(4)
+    async with AsyncSessionLocal() as db:
+        users = [User(email=f"query-count-{run_id}-{i}@example.com", provider="test",
+                      provider_id=f"query-count-{run_id}-{i}") for i in range(USERS)]
+        owner = users[0]
+        walls = [PrayerWall(owner=owner, title=f"Wall {i}", description="Query count check") for i in range(WALLS)]
+        prayer = Prayer(user=owner, transcription="Please pray for my family", entity="Family",
+                        synopsis="Prayer for family", description="Prayer for family",
+                        prayer_type=PrayerType.request)
+        db.add_all(users + walls + [prayer])
+        await db.flush()
+        await db.execute(insert(prayer_wall_users), [
+            {"user_id": user.id, "prayer_wall_id": wall.id, "role": "owner" if user is owner else "member"}
+            for wall in walls for user in users
+        ])
+        await db.execute(insert(prayer_wall_prayers), [
+            {"prayer_id": prayer.id, "prayer_wall_id": wall.id} for wall in walls
+        ])
+        await db.commit()
+    return owner, users[1], prayer
+
+
+async def main() -> int:
+    owner, member, prayer = await create_walls()
+    # (description, listing, most queries it may take)
+    checks = [
+        ("walls the owner is on", lambda db: get_user_walls(db, owner), 1),
+        ("walls a member is on", lambda db: get_user_walls(db, member), 1),
+        # Plus loading the prayer to check its ownership
+        ("walls a prayer is shared on", lambda db: get_prayer_walls(prayer.id, db, owner), 2),
+    ]
+
+    failures = 0
+    for description, call, expected in checks:
+        async with AsyncSessionLocal() as db:
+            # Let the session check out its connection and begin outside the count
+            await db.connection()
+            with count_queries() as statements:
+                response = await call(db)
+        walls = response.prayer_walls
+        ok = len(statements) <= expected and len(walls) == WALLS and all(len(wall.users) == USERS for wall in walls)
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {description:<28} {len(statements)} queries (expected {expected}), "
+              f"{len(walls)} walls with {sorted({len(wall.users) for wall in walls})} members")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
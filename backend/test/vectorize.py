@@ -17,6 +17,10 @@ from functools import partial
 import asyncio
 
 from app.db.database import get_vector_store
+from app.config.llm import bind_event_loop, langchain_embeddings
+from app.services.embedding_artifact import (write_embedding_artifact,
+                                             load_embedding_artifact,
+                                             resolve_artifact_path)
 
 
 llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
@@ -143,7 +147,26 @@ async def create_vector_store_from_docs(docs: list, vdb, tenant: str):
     return 
 
 
+async def export_embeddings(docs: list, artifact_dir: str):
+    """
+    Embed the documents once and write them as a versioned, memory-mappable artifact.
+    Reuses the latest artifact when it was built from the same model and chunks.
+    """
+    if os.path.exists(os.path.join(artifact_dir, "LATEST")):
+        artifact = load_embedding_artifact(resolve_artifact_path(artifact_dir))
+        if (artifact.model == langchain_embeddings.model and
+                [meta["text"] for meta in artifact.metadata] == [doc.page_content for doc in docs]):
+            print(f"Reusing embedding artifact {artifact.path}")
+            return artifact
+
+    vectors = await langchain_embeddings.aembed_documents([doc.page_content for doc in docs])
+    path = write_embedding_artifact(docs, vectors, langchain_embeddings.model, artifact_dir)
+    return load_embedding_artifact(path)
+
+
 async def main():
+    # Texts missing from the artifact are embedded synchronously during ingest
+    bind_event_loop()
     # -----------------------------------------------
     # Configuration & Initialization
     # ----------------------------------------------
@@ -164,8 +187,6 @@ async def main():
     
     print(f"Found {len(checkpoint_files)} checkpoint files")
     
-    # Initialize vector store
-    vdb, client = await get_vector_store()
     all_docs = []
     for checkpoint_file in checkpoint_files:
         try:
@@ -182,6 +203,11 @@ async def main():
     # Create vector store from all documents
     if all_docs:
         try:
+            artifact_dir = config.EMBEDDING_ARTIFACT_DIR or os.path.join(data_dir, "embeddings")
+            artifact = await export_embeddings(all_docs, artifact_dir)
+
+            # Ingest with the exported vectors so Weaviate does not re-embed the corpus
+            vdb, client = await get_vector_store(embedding=artifact.as_embeddings(fallback=langchain_embeddings))
             await create_vector_store_from_docs(all_docs, vdb, "Bible")
             print("Successfully created vector store from all documents")
         except Exception as e: